@@ -0,0 +1,20 @@
+"""
+URL configuration used under ASGI: the read-heavy pages are served by native
+async views, everything else falls through to devSearch.urls.
+"""
+from django.urls import path
+
+from main import async_views
+from users import async_views as users_async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+
+urlpatterns = [
+    path('', async_views.index, name='index'),
+    path('projects/', async_views.projects, name='projects'),
+    path('projects/<int:id>', async_views.singleProject, name='single-project'),
+    path('projects/<int:id>/comments', async_views.projectComments, name='project-comments'),
+    path('messages/', async_views.inbox, name='inbox'),
+    path('users/profile/<str:username>', users_async_views.profile, name='profile'),
+] + sync_urlpatterns
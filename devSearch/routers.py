@@ -0,0 +1,112 @@
+"""
+Send reads to the replicas listed in DATABASE_REPLICAS and writes to the
+primary. Once a request writes, its reads and those of the client's next
+requests (for REPLICA_STICKY_SECONDS, via a cookie) stay on the primary so
+that redirects after a form never show stale rows.
+"""
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+STICKY_COOKIE = 'db_primary'
+
+_replica = ContextVar('replica', default=None)
+_pinned = ContextVar('pinned', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+
+class ReplicaHealth:
+    """Probe every replica at most once per REPLICA_HEALTH_INTERVAL and remember which ones failed."""
+
+    def __init__(self):
+        self.down = set()
+        self.checked = float('-inf')
+        self.lock = threading.Lock()
+
+    def available(self):
+        return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if alias not in self.down]
+
+    def check(self, force=False):
+        interval = getattr(settings, 'REPLICA_HEALTH_INTERVAL', 30)
+        if not force and time.monotonic() - self.checked < interval:
+            return
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            down = set()
+            for alias in getattr(settings, 'DATABASE_REPLICAS', []):
+                if alias in self.down:
+                    # Reconnect from scratch rather than probing a connection that already failed.
+                    connections[alias].close()
+                try:
+                    with connections[alias].cursor() as cursor:
+                        cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+                except DatabaseError:
+                    down.add(alias)
+                    connections[alias].close()
+            self.down, self.checked = down, time.monotonic()
+        finally:
+            self.lock.release()
+
+
+health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Sessions are written at login and read right after, so they never lag behind.
+        if _pinned.get() or model._meta.app_label == 'sessions':
+            return DEFAULT_DB_ALIAS
+        replica = _replica.get()
+        if replica is None or replica in health.down:
+            replicas = health.available()
+            if not replicas:
+                return DEFAULT_DB_ALIAS
+            # One replica per request, so a page never mixes rows from replicas with different lag.
+            replica = random.choice(replicas)
+            _replica.set(replica)
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaStickinessMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        health.check()
+        tokens = (
+            _replica.set(None),
+            _pinned.set(STICKY_COOKIE in request.COOKIES),
+            _wrote.set(False),
+        )
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            for var, token in zip((_replica, _pinned, _wrote), tokens):
+                var.reset(token)
+
+        if wrote:
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 5),
+                httponly=True, samesite='Lax'
+            )
+        return response
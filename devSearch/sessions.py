@@ -0,0 +1,134 @@
+"""
+Cached-DB sessions with an extra least-recently-used tier in process memory.
+
+Every save gives a session a new random stamp in the shared cache, and a
+logout drops it. A warm request reads only that small stamp and takes the
+session from the local tier when the stamps match, so a save or logout in
+any process takes effect everywhere at once. Entries also expire after
+SESSION_LOCAL_TIMEOUT seconds.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils.crypto import get_random_string
+
+
+def stamp_key(cache_key):
+    return f'{cache_key}:stamp'
+
+
+class LocalTier:
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, stamp):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, entry_stamp, data = entry
+            if expires < time.monotonic() or entry_stamp != stamp:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        # Sessions mutate the dict they load, which must not change the shared copy.
+        return copy.deepcopy(data)
+
+    def set(self, key, stamp, data):
+        timeout = getattr(settings, 'SESSION_LOCAL_TIMEOUT', 10)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, stamp, copy.deepcopy(data))
+            self.entries.move_to_end(key)
+            while len(self.entries) > getattr(settings, 'SESSION_LOCAL_SIZE', 1000):
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local = LocalTier()
+
+
+class SessionStore(CachedDBStore):
+    def claim_stamp(self, key, stamp):
+        """
+        The stamp to keep a just-loaded session under. A session without one
+        gets a new one, unless a save in another process set one meanwhile.
+        """
+        if stamp is not None:
+            return stamp
+        stamp = get_random_string(16)
+        return stamp if self._cache.add(stamp_key(key), stamp, settings.SESSION_COOKIE_AGE) else None
+
+    async def aclaim_stamp(self, key, stamp):
+        if stamp is not None:
+            return stamp
+        stamp = get_random_string(16)
+        return stamp if await self._cache.aadd(stamp_key(key), stamp, settings.SESSION_COOKIE_AGE) else None
+
+    def load(self):
+        if self.session_key is None:
+            return super().load()
+        # Read the stamp first: a save after this point changes it and invalidates what is loaded below.
+        key = self.cache_key
+        stamp = self._cache.get(stamp_key(key))
+        data = local.get(key, stamp) if stamp is not None else None
+        if data is not None:
+            return data
+        data = super().load()
+        if data:
+            stamp = self.claim_stamp(key, stamp)
+            if stamp is not None:
+                local.set(key, stamp, data)
+        return data
+
+    async def aload(self):
+        if self.session_key is None:
+            return await super().aload()
+        key = await self.acache_key()
+        stamp = await self._cache.aget(stamp_key(key))
+        data = local.get(key, stamp) if stamp is not None else None
+        if data is not None:
+            return data
+        data = await super().aload()
+        if data:
+            stamp = await self.aclaim_stamp(key, stamp)
+            if stamp is not None:
+                local.set(key, stamp, data)
+        return data
+
+    def save(self, must_create=False):
+        super().save(must_create)
+        stamp = get_random_string(16)
+        self._cache.set(stamp_key(self.cache_key), stamp, settings.SESSION_COOKIE_AGE)
+        local.set(self.cache_key, stamp, self._session)
+
+    async def asave(self, must_create=False):
+        await super().asave(must_create)
+        stamp = get_random_string(16)
+        await self._cache.aset(stamp_key(await self.acache_key()), stamp, settings.SESSION_COOKIE_AGE)
+        local.set(await self.acache_key(), stamp, self._session)
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        super().delete(session_key)
+        if session_key is not None:
+            self._cache.delete(stamp_key(self.cache_key_prefix + session_key))
+            local.delete(self.cache_key_prefix + session_key)
+
+    async def adelete(self, session_key=None):
+        session_key = session_key or self.session_key
+        await super().adelete(session_key)
+        if session_key is not None:
+            await self._cache.adelete(stamp_key(self.cache_key_prefix + session_key))
+            local.delete(self.cache_key_prefix + session_key)
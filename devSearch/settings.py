@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 from dotenv import dotenv_values
@@ -30,6 +31,8 @@ DEBUG = True
 
 ALLOWED_HOSTS = ["*"]
 
+INTERNAL_IPS = ['127.0.0.1']
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -45,15 +48,17 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'devSearch.routers.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'devSearch.urls'
+# devSearch/asgi.py turns on the async views; set DEVNET_ASYNC_VIEWS=0 to serve the sync ones under ASGI too
+ROOT_URLCONF = 'devSearch.asgi_urls' if os.environ.get('DEVNET_ASYNC_VIEWS') == '1' else 'devSearch.urls'
 
 TEMPLATES = [
     {
@@ -81,9 +86,67 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(ENV.get('CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas: REPLICA_DATABASES is a comma-separated list of replica file names
+# (SQLite) or hosts (other engines); each becomes an alias copying 'default'.
+for index, location in enumerate(filter(None, ENV.get('REPLICA_DATABASES', '').split(',')), 1):
+    key = 'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'
+    DATABASES[f'replica{index}'] = dict(DATABASES['default'], **{key: location.strip()}, TEST={'MIRROR': 'default'})
+
+DATABASE_ROUTERS = ['devSearch.routers.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# Seconds a client keeps reading from the primary after one of its requests wrote
+REPLICA_STICKY_SECONDS = 5
+# Seconds between probes of the replicas; a failed replica is skipped until the next probe
+REPLICA_HEALTH_INTERVAL = 30
+
+
+# Views decorated with main.decorators.query_budget warn when they exceed their
+# query budget; strict mode raises instead, which is handy under test.
+QUERY_BUDGET_CHECKS = DEBUG
+QUERY_BUDGET_STRICT = False
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'devnet',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Page purges, search index versions, sessions and cached users are shared
+# through this cache, so more than one server process needs a shared backend:
+# Redis for several hosts, or a cache directory for processes on one host.
+# `manage.py check --deploy` fails while the cache lives in process memory.
+if ENV.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': ENV['REDIS_URL'],
+    }
+elif ENV.get('CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': ENV['CACHE_DIR'],
+    }
+
+# Sessions live in the cache and the database, with the hottest ones also kept
+# in process memory for SESSION_LOCAL_TIMEOUT seconds
+SESSION_ENGINE = 'devSearch.sessions'
+SESSION_LOCAL_SIZE = 1000
+SESSION_LOCAL_TIMEOUT = 10
+
+# Seconds a logged-in user and their account stay cached between saves
+USER_CACHE_TIMEOUT = 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -118,8 +181,15 @@ USE_L10N = True
 USE_TZ = True
 
 
+# Requests only queue mail; manage.py send_queued_mail delivers it through
+# MAIL_QUEUE_BACKEND, retrying a failed message up to MAIL_QUEUE_MAX_ATTEMPTS
+# times after MAIL_QUEUE_RETRY_DELAY seconds, doubling each time
+EMAIL_BACKEND = 'main.mail.QueueBackend'
+MAIL_QUEUE_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+MAIL_QUEUE_MAX_ATTEMPTS = 8
+MAIL_QUEUE_RETRY_DELAY = 60
+
 # Email configuration - uncomment and configure when needed
-# EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 # EMAIL_HOST = 'smtp.gmail.com'
 # EMAIL_PORT = 587
 # EMAIL_USE_TLS = True
@@ -139,6 +209,19 @@ STATICFILES_DIRS = [
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
+# Worker processes used to encode image renditions off the request path
+RENDITION_WORKERS = 2
+
+# Ranked search results are kept per normalised query, in each process, for up to
+# SEARCH_CACHE_TIMEOUT seconds or until the search index changes
+SEARCH_CACHE_SIZE = 500
+SEARCH_CACHE_TIMEOUT = 300
+
+# Snapshot of the search autocomplete index, written by manage.py build_autocomplete;
+# workers reload it when it changes, checking at most every AUTOCOMPLETE_RELOAD seconds
+AUTOCOMPLETE_SNAPSHOT = BASE_DIR / 'autocomplete.snapshot'
+AUTOCOMPLETE_RELOAD = 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -1,7 +1,13 @@
 from django.contrib import admin
 
-from .models import Project, Comment, Message
+from .models import Project, Comment, Message, QueuedMail
 
 admin.site.register(Project)
 admin.site.register(Comment)
 admin.site.register(Message)
+
+
+@admin.register(QueuedMail)
+class QueuedMailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'created', 'attempts', 'next_attempt')
+    readonly_fields = ('created', 'last_error')
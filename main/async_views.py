@@ -0,0 +1,140 @@
+"""
+Native async versions of the read-heavy views, routed by devSearch.asgi_urls.
+The ORM runs every query on the one thread of the request's connection, so
+queries are awaited in turn; templates and the card cache are still
+synchronous and run through sync_to_async.
+"""
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from users.models import Account
+
+from .cards import project_cards, render_cards
+from .conditional import conditional_page, developers_modified, project_modified, projects_modified
+from .decorators import query_budget
+from .models import Project, Message, RelatedProject, Tag
+from .pagecache import cache_anonymous_page, tag_page
+from .pagination import KeysetPaginator, estimated_count
+from .views import (
+    MESSAGES_PER_PAGE, PER_PAGE, comment_paginator, developer_facets, developer_list, developer_total, filter_ids,
+    page_filters, search_page, search_redirect
+)
+from . import search
+
+
+arender = sync_to_async(render)
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def apage(paginator, cursor, model):
+    page = await paginator.aget_page(cursor)
+    page.total = await sync_to_async(estimated_count)(model)
+    return page
+
+
+@conditional_page(developers_modified)
+@cache_anonymous_page
+@query_budget(9)
+async def index(request):
+    if request.method == 'POST':
+        return search_redirect(request)
+    cursor, query = request.GET.get('cursor'), request.GET.get('q', '').strip()
+    chips, active = await sync_to_async(developer_facets)(request)
+    if query:
+        ids = await sync_to_async(search.search_developers)(query)
+        page_users = await sync_to_async(search_page)(await sync_to_async(filter_ids)(ids, active), cursor)
+        page_ids = page_users.object_list
+    else:
+        paginator = KeysetPaginator(developer_list(active).only('id', 'date_joined'), PER_PAGE, ('-date_joined', 'id'))
+        if active == []:
+            page_users = await apage(paginator, cursor, User)
+        else:
+            page_users = await paginator.aget_page(cursor, developer_total(active))
+        page_ids = [user.pk for user in page_users]
+
+    tag_page(request, 'developers', *(f'user:{pk}' for pk in page_ids))
+    context = {
+        'users': page_users,
+        'cards': await sync_to_async(render_cards)('developer', page_ids),
+        'query': query,
+        'filters': page_filters(request),
+        'skill_facets': chips['skill'],
+        'location_facets': chips['location']
+    }
+    return await arender(request, 'index.html', context)
+
+
+@conditional_page(projects_modified)
+@cache_anonymous_page
+@query_budget(6)
+async def projects(request):
+    if request.method == 'POST':
+        return search_redirect(request)
+    cursor, query = request.GET.get('cursor'), request.GET.get('q', '').strip()
+    snippets = None
+    if query:
+        page_projects = await sync_to_async(search_page)(await sync_to_async(search.search_projects)(query), cursor)
+        page_ids = page_projects.object_list
+        snippets = await sync_to_async(search.project_snippets)(query, page_ids)
+    else:
+        paginator = KeysetPaginator(Project.objects.only('id', 'date'), PER_PAGE, ('-date', 'id'))
+        page_projects = await apage(paginator, cursor, Project)
+        page_ids = [project.pk for project in page_projects]
+
+    tag_page(request, 'projects', *(f'project:{pk}' for pk in page_ids))
+    context = {
+        'projects': page_projects,
+        'cards': await sync_to_async(render_cards)('project', page_ids, snippets),
+        'popular_tags': await alist(Tag.objects.popular()),
+        'query': query,
+        'filters': page_filters(request)
+    }
+    return await arender(request, 'projects.html', context)
+
+
+@conditional_page(project_modified)
+@cache_anonymous_page
+@query_budget(7)
+async def singleProject(request, id):
+    if request.method == 'POST':
+        project = await aget_object_or_404(Project, id=id)
+        await project.comment_set.acreate(
+            author=await request.auser(),
+            text=request.POST.get('message')
+        )
+        return redirect('single-project', project.id)
+
+    paginator = comment_paginator(id)
+    project = await aget_object_or_404(project_cards(), id=id)
+    comments = await paginator.aget_page(request.GET.get('comments'))
+    related = await alist(RelatedProject.objects.filter(project_id=id).select_related('related').order_by('rank'))
+    authors = {project.user_id} | {comment.author_id for comment in comments}
+    tag_page(request, f'project:{project.pk}', *(f'user:{pk}' for pk in authors))
+    return await arender(request, 'single-project.html', {
+        'project': project, 'comments': comments, 'related_projects': related
+    })
+
+
+@cache_anonymous_page
+@query_budget(1)
+async def projectComments(request, id):
+    comments = await comment_paginator(id).aget_page(request.GET.get('cursor'))
+    tag_page(request, f'project:{id}', *(f'user:{comment.author_id}' for comment in comments))
+    return await arender(request, 'comments.html', {'comments': comments, 'project_id': id})
+
+
+@login_required(login_url='login')
+@query_budget(5)
+async def inbox(request):
+    user = await request.auser()
+    messages = Message.objects.filter(user_to=user).select_related('user_from')
+    paginator = KeysetPaginator(messages, MESSAGES_PER_PAGE, ('-date', '-id'))
+    page_messages = await paginator.aget_page(request.GET.get('cursor'))
+    unread = await Account.objects.filter(user=user).values_list('unread_count', flat=True).afirst()
+    return await arender(request, 'inbox.html', {'messages': page_messages, 'unread': unread})
@@ -0,0 +1,442 @@
+"""
+Typeahead over developer names, project titles, skills and tags, answered
+from a sorted in-process prefix index without touching the database.
+
+Every record is indexed under each word-suffix of its label, so "smi" finds
+"John Smith". The index is loaded from AUTOCOMPLETE_SNAPSHOT at startup.
+``manage.py build_autocomplete`` writes the snapshot, and so do ``seed`` and
+``import_developers`` when they finish; processes check its mtime at most
+every AUTOCOMPLETE_RELOAD seconds. Signals apply each write to this
+process's index and, once it commits, publish it in the shared cache as a
+numbered change. Every search replays the changes published since the index
+was built, and an index that finds one missing is rebuilt from the database.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from heapq import nsmallest
+from itertools import compress
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('developer', 'project', 'skill', 'tag')
+MAX_WORDS = 4
+LIMIT = 10
+COMPACT_AT = 4096
+HEAD_KEY = 'autocomplete:head'
+CHANGE_TIMEOUT = 60 * 60 * 24
+REPLAY_BATCH = 500
+
+_index = None
+_index_lock = threading.Lock()
+_rebuilding = threading.Event()
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '').casefold()
+    return ' '.join(''.join(char for char in text if not unicodedata.combining(char)).split())
+
+
+def prefixes(label):
+    words = normalize(label).split()
+    return list(dict.fromkeys(' '.join(words[start:]) for start in range(min(len(words), MAX_WORDS))))
+
+
+def change_key(number):
+    return f'autocomplete:change:{number}'
+
+
+class PrefixIndex:
+    """
+    Sorted keys with a parallel array of record ids, plus a short sorted list
+    of the (key, rid) pairs added since, merged in once it passes COMPACT_AT.
+    Records are [kind, ident, label, value, weight]; ident is the pk, or the
+    normalised name for skills, which have no row of their own. Weights and
+    kinds are also kept in arrays by record id, so a search ranks all its
+    matches at once; a removed record keeps its keys until the next merge and
+    is skipped by its weight of -1.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.rids = np.zeros(0, dtype=np.uint32)
+        self.added = []
+        self.records = []
+        self.weights = np.zeros(0, dtype=np.int64)
+        self.kinds = np.zeros(0, dtype=np.uint8)
+        self.by_ident = {}
+        self.lock = threading.RLock()
+        self.mtime = None
+        self.version = 0
+        self.own = set()
+
+    def __len__(self):
+        return len(self.by_ident)
+
+    def put(self, kind, ident, label, value='', weight=None):
+        """Add or replace a record; a weight of None keeps the current one."""
+        with self.lock:
+            rid = self.by_ident.get((kind, ident))
+            if rid is not None:
+                record = self.records[rid]
+                if weight is None:
+                    weight = record[4]
+                if prefixes(record[2]) == prefixes(label):
+                    record[2:] = [label, value, weight]
+                    self.weights[rid] = weight
+                    return
+                self._drop(rid)
+            keys = prefixes(label)
+            if not keys:
+                return
+            rid = self.by_ident[kind, ident] = len(self.records)
+            self.records.append([kind, ident, label, value, weight or 0])
+            if rid == len(self.weights):
+                size = max(2 * rid, 16)
+                self.weights = np.resize(self.weights, size)
+                self.kinds = np.resize(self.kinds, size)
+            self.weights[rid] = weight or 0
+            self.kinds[rid] = KINDS.index(kind)
+            for key in keys:
+                insort(self.added, (key, rid))
+            if len(self.added) > COMPACT_AT:
+                self._compact()
+
+    def remove(self, kind, ident):
+        with self.lock:
+            rid = self.by_ident.get((kind, ident))
+            if rid is not None:
+                self._drop(rid)
+
+    def add_skill(self, name):
+        with self.lock:
+            record = self.record('skill', normalize(name))
+            if record:
+                self.put('skill', normalize(name), record[2], record[3], record[4] + 1)
+            else:
+                self.put('skill', normalize(name), name, name, 1)
+
+    def remove_skill(self, name):
+        with self.lock:
+            record = self.record('skill', normalize(name))
+            if record is None:
+                return
+            if record[4] > 1:
+                self.put('skill', normalize(name), record[2], record[3], record[4] - 1)
+            else:
+                self.remove('skill', normalize(name))
+
+    def apply(self, change):
+        """Apply a published change, a list of a method name and its arguments."""
+        action, *args = change
+        getattr(self, action)(*args)
+
+    def _drop(self, rid):
+        record = self.records[rid]
+        del self.by_ident[record[0], record[1]]
+        self.records[rid] = None
+        self.weights[rid] = -1
+
+    def _compact(self):
+        """Merge the added keys into the sorted arrays and renumber the live records."""
+        positions = [bisect_left(self.keys, key) for key, _ in self.added]
+        keys, start = [], 0
+        for position, (key, _) in zip(positions, self.added):
+            keys += self.keys[start:position]
+            keys.append(key)
+            start = position
+        keys += self.keys[start:]
+        rids = np.insert(self.rids, positions, np.array([rid for _, rid in self.added], dtype=np.uint32))
+        self.added = []
+
+        live = self.weights[:len(self.records)] >= 0
+        if not live.all():
+            kept = live[rids]
+            keys, rids = list(compress(keys, kept.tolist())), rids[kept]
+            rids = (np.cumsum(live, dtype=np.uint32) - 1)[rids]
+            self.records = list(compress(self.records, live.tolist()))
+            self.weights, self.kinds = self.weights[:len(live)][live], self.kinds[:len(live)][live]
+            self.by_ident = {(record[0], record[1]): rid for rid, record in enumerate(self.records)}
+        self.keys, self.rids = keys, rids
+
+    @classmethod
+    def from_records(cls, records):
+        """Build an index from [kind, ident, label, value, weight] lists with a single sort."""
+        index = cls()
+        pairs = []
+        for record in records:
+            keys = prefixes(record[2])
+            if keys and (record[0], record[1]) not in index.by_ident:
+                rid = index.by_ident[record[0], record[1]] = len(index.records)
+                index.records.append(list(record))
+                pairs += [(key, rid) for key in keys]
+        pairs.sort()
+        index.keys = [key for key, _ in pairs]
+        index.rids = np.array([rid for _, rid in pairs], dtype=np.uint32)
+        index.weights = np.array([record[4] for record in index.records], dtype=np.int64)
+        index.kinds = np.array([KINDS.index(record[0]) for record in index.records], dtype=np.uint8)
+        return index
+
+    def record(self, kind, ident):
+        rid = self.by_ident.get((kind, ident))
+        return None if rid is None else self.records[rid]
+
+    def search(self, query, kinds=KINDS, limit=LIMIT):
+        """The heaviest records with a key starting with ``query``, ties broken by label."""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        stop = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self.lock:
+            rids = self.rids[bisect_left(self.keys, prefix):bisect_left(self.keys, stop)]
+            added = self.added[bisect_left(self.added, (prefix,)):bisect_left(self.added, (stop,))]
+            if added:
+                rids = np.concatenate([rids, np.array([rid for _, rid in added], dtype=np.uint32)])
+            rids = np.unique(rids)
+            weights = self.weights[rids]
+            keep = weights >= 0
+            if set(kinds) != set(KINDS):
+                keep &= np.isin(self.kinds[rids], [KINDS.index(kind) for kind in kinds])
+            rids, weights = rids[keep], weights[keep]
+            if len(rids) > limit:
+                floor = np.partition(weights, len(weights) - limit)[len(weights) - limit]
+                heavier = rids[weights > floor].tolist()
+                tied = (self.records[rid] for rid in rids[weights == floor].tolist())
+                found = [self.records[rid] for rid in heavier]
+                found += nsmallest(limit - len(found), tied, key=lambda record: record[2])
+            else:
+                found = [self.records[rid] for rid in rids.tolist()]
+        return sorted(found, key=lambda record: (-record[4], record[2]))
+
+    def dump(self, path):
+        """Write the index as a header line followed by packed arrays and NUL-separated strings."""
+        with self.lock:
+            self._compact()
+            records = [list(record) for record in self.records]
+            keys, rids, version = list(self.keys), self.rids.astype(np.uint32), self.version
+
+        blobs = {
+            'kinds': array('B', (KINDS.index(record[0]) for record in records)).tobytes(),
+            'idents': '\0'.join(str(record[1]) for record in records).encode(),
+            'labels': '\0'.join(record[2] for record in records).encode(),
+            'values': '\0'.join(record[3] for record in records).encode(),
+            'weights': array('q', (record[4] for record in records)).tobytes(),
+            'keys': '\0'.join(keys).encode(),
+            'rids': rids.tobytes(),
+        }
+        header = {
+            'records': len(records), 'version': version,
+            'sizes': {name: len(blob) for name, blob in blobs.items()},
+        }
+        # A unique file per writer, so concurrent rebuilds never interleave before the atomic rename.
+        descriptor, temporary = tempfile.mkstemp(
+            prefix=f'.{os.path.basename(path)}.', dir=os.path.dirname(os.path.abspath(path))
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(json.dumps(header).encode() + b'\n')
+                for blob in blobs.values():
+                    file.write(blob)
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with open(path, 'rb') as file:
+            index.mtime = os.fstat(file.fileno()).st_mtime
+            header = json.loads(file.readline())
+            blobs = {name: file.read(size) for name, size in header['sizes'].items()}
+
+        def strings(name):
+            return blobs[name].decode().split('\0') if header['records'] else []
+
+        index.kinds = np.frombuffer(blobs['kinds'], dtype=np.uint8).copy()
+        index.weights = np.array(array('q', blobs['weights']), dtype=np.int64)
+        for rid, (kind, ident, label, value) in enumerate(zip(index.kinds.tolist(), strings('idents'), strings('labels'), strings('values'))):
+            kind = KINDS[kind]
+            ident = ident if kind == 'skill' else int(ident)
+            index.records.append([kind, ident, label, value, int(index.weights[rid])])
+            index.by_ident[kind, ident] = rid
+        index.keys = blobs['keys'].decode().split('\0') if blobs['keys'] else []
+        index.rids = np.array(array('I', blobs['rids']), dtype=np.uint32)
+        index.version = header.get('version', 0)
+        return index
+
+
+def build():
+    """Index every developer, project, skill and tag from the database."""
+    from django.contrib.auth.models import User
+    from django.db.models import Count
+    from users.models import Skill
+    from .models import Project, Tag
+
+    records = []
+    projects = dict(Project.objects.values('user_id').annotate(count=Count('id')).values_list('user_id', 'count'))
+    for pk, username, first_name, last_name in User.objects.values_list('pk', 'username', 'first_name', 'last_name').iterator():
+        records.append(('developer', pk, f'{first_name} {last_name}'.strip() or username, username, projects.get(pk, 0)))
+    for pk, title, comment_count in Project.objects.values_list('pk', 'title', 'comment_count').iterator():
+        records.append(('project', pk, title, str(pk), comment_count))
+    for pk, name, slug, project_count in Tag.objects.values_list('pk', 'name', 'slug', 'project_count').iterator():
+        records.append(('tag', pk, name, slug, project_count))
+
+    skills, labels = Counter(), {}
+    for name in Skill.objects.values_list('name', flat=True).iterator():
+        skills[normalize(name)] += 1
+        labels.setdefault(normalize(name), name)
+    records += [('skill', ident, labels[ident], labels[ident], count) for ident, count in skills.items()]
+    return PrefixIndex.from_records(records)
+
+
+def rebuild(path=None):
+    """Build the index from the database and write the snapshot that every process loads."""
+    path = path or settings.AUTOCOMPLETE_SNAPSHOT
+    # Changes published while the rows are read are replayed on top; replaying one twice is harmless.
+    version = cache.get(HEAD_KEY) or 0
+    index = build()
+    index.version = version
+    index.dump(path)
+    index.mtime = os.stat(path).st_mtime
+    return index
+
+
+def _build_and_save(path):
+    global _index
+    try:
+        index = rebuild(path)
+    except Exception:
+        logger.exception('Could not build the autocomplete index')
+        return
+    finally:
+        connections.close_all()
+        _rebuilding.clear()
+    with _index_lock:
+        index.checked = time.monotonic()
+        _index = index
+
+
+def _rebuild_in_background(path):
+    if not _rebuilding.is_set():
+        _rebuilding.set()
+        threading.Thread(target=_build_and_save, args=(path,), daemon=True).start()
+
+
+def replay(index):
+    """
+    Apply the changes published since ``index.version``, skipping this
+    process's own. Return False when one of them has expired from the cache.
+    """
+    head = cache.get(HEAD_KEY) or 0
+    while index.version < head:
+        numbers = range(index.version + 1, min(head, index.version + REPLAY_BATCH) + 1)
+        changes = cache.get_many([change_key(number) for number in numbers])
+        for number in numbers:
+            change = changes.get(change_key(number))
+            if change is None:
+                return False
+            if number in index.own:
+                index.own.discard(number)
+            else:
+                index.apply(change)
+            index.version = number
+    return True
+
+
+def get_index():
+    """
+    Return this process's index, reloading it when the snapshot changed and
+    replaying the changes other processes published. With no snapshot yet,
+    or a change that can no longer be replayed, the index is rebuilt in the
+    background and the current one answers until then.
+    """
+    global _index
+    path = settings.AUTOCOMPLETE_SNAPSHOT
+    with _index_lock:
+        index = _index
+        now = time.monotonic()
+        if index is None or now - getattr(index, 'checked', 0) >= getattr(settings, 'AUTOCOMPLETE_RELOAD', 60):
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                mtime = None
+
+            if mtime is not None and (index is None or mtime != index.mtime):
+                try:
+                    index = PrefixIndex.load(path)
+                except (OSError, ValueError, IndexError):
+                    logger.exception('Could not load the autocomplete snapshot %s', path)
+            if index is None:
+                index = PrefixIndex()
+                if mtime is None:
+                    _rebuild_in_background(path)
+            index.checked = now
+            _index = index
+        if not replay(index):
+            _rebuild_in_background(path)
+        return index
+
+
+def preload():
+    """Load the snapshot in the background at startup, so the first request does not wait for it."""
+    if os.path.exists(settings.AUTOCOMPLETE_SNAPSHOT):
+        threading.Thread(target=get_index, daemon=True).start()
+
+
+def search(query, kinds=KINDS, limit=LIMIT):
+    return get_index().search(query, kinds, limit)
+
+
+def publish(change, index=None):
+    """
+    Store ``change`` under the next free number and move the head to it. A
+    number is taken with an atomic add, so concurrent writers never share one.
+    ``index`` already has the change applied and skips it when replaying.
+    """
+    with _index_lock:
+        number = (cache.get(HEAD_KEY) or 0) + 1
+        while not cache.add(change_key(number), change, CHANGE_TIMEOUT):
+            number += 1
+        if number > (cache.get(HEAD_KEY) or 0):
+            cache.set(HEAD_KEY, number, None)
+        if index is not None and index is _index:
+            index.own.add(number)
+        return number
+
+
+def _change(*change):
+    index = _index
+    if index is not None:
+        index.apply(change)
+    transaction.on_commit(lambda: publish(list(change), index))
+
+
+def put(kind, ident, label, value='', weight=None):
+    _change('put', kind, ident, label, value, weight)
+
+
+def remove(kind, ident):
+    _change('remove', kind, ident)
+
+
+def add_skill(name):
+    _change('add_skill', name)
+
+
+def remove_skill(name):
+    _change('remove_skill', name)
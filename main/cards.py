@@ -0,0 +1,92 @@
+import time
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+
+TEMPLATES = {
+    'developer': 'cards/developer.html',
+    'project': 'cards/project.html',
+}
+TIMEOUT = 60 * 60 * 24
+SNIPPET_SLOT = '<!-- snippet -->'
+
+
+def developer_cards():
+    from django.contrib.auth.models import User
+    return User.objects.select_related('account').prefetch_related('account__skill_set')
+
+
+def project_cards():
+    from .models import Project
+    return Project.objects.select_related('user').prefetch_related('tags')
+
+
+LOADERS = {
+    'developer': developer_cards,
+    'project': project_cards,
+}
+
+
+def version_key(kind, pk):
+    return f'card-version:{kind}:{pk}'
+
+
+def card_key(kind, pk):
+    return f'card:{kind}:{pk}'
+
+
+def bump(kind, *pks):
+    for pk in pks:
+        try:
+            cache.incr(version_key(kind, pk))
+        except ValueError:
+            # A lost counter restarts from the clock so it can never match an older card.
+            cache.set(version_key(kind, pk), time.time_ns(), None)
+
+
+def render_cards(kind, pks, snippets=None, objects=None):
+    """
+    Return the rendered card of every pk in order, reading versions and cards
+    with a single get_many and loading and rendering only the misses. Misses
+    found in ``objects`` ({pk: instance}) are rendered without a query.
+    """
+    keys = [card_key(kind, pk) for pk in pks] + [version_key(kind, pk) for pk in pks]
+    found = cache.get_many(keys)
+
+    cards, missing, versions = {}, [], {}
+    for pk in pks:
+        version = found.get(version_key(kind, pk))
+        if version is None:
+            version = time.time_ns()
+            if not cache.add(version_key(kind, pk), version, None):
+                version = cache.get(version_key(kind, pk), version)
+        versions[pk] = version
+
+        card = found.get(card_key(kind, pk))
+        if card is not None and card[0] == version:
+            cards[pk] = card[1]
+        else:
+            missing.append(pk)
+
+    if missing:
+        rendered = {}
+        objects = objects or {}
+        loaded = [objects[pk] for pk in missing if pk in objects]
+        if len(loaded) < len(missing):
+            loaded += LOADERS[kind]().filter(pk__in=[pk for pk in missing if pk not in objects])
+        for obj in loaded:
+            html = render_to_string(TEMPLATES[kind], {kind: obj})
+            cards[obj.pk] = html
+            rendered[card_key(kind, obj.pk)] = (versions[obj.pk], str(html))
+        cache.set_many(rendered, TIMEOUT)
+
+    result = []
+    for pk in pks:
+        if pk in cards:
+            html = cards[pk]
+            if snippets and pk in snippets:
+                html = html.replace(SNIPPET_SLOT, f'<p class="project__snippet">{snippets[pk]}</p>')
+            result.append(mark_safe(html))
+    return result
@@ -0,0 +1,20 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+def local_cache(alias='default'):
+    """Whether a cache lives in this process's memory, out of reach of other server processes."""
+    return isinstance(caches[alias], LocMemCache)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if not local_cache():
+        return []
+    return [Error(
+        'The default cache is process-local, so page purges, search index updates, '
+        'logouts and user edits never reach the other server processes.',
+        hint='Set REDIS_URL, or CACHE_DIR for processes on one host, in .env.',
+        id='main.E001',
+    )]
@@ -0,0 +1,139 @@
+"""
+Conditional GET for pages that follow the maintained ``updated_at`` columns
+of Project and Account. The signals touch these columns whenever something
+shown on the page changes, and a User edit touches its Account. One indexed
+query is enough to revalidate a page, and a match is answered with 304
+before the view runs.
+
+Profile edits by comment authors do not touch the projects they commented
+on. The anonymous page cache still tracks those through its tags.
+"""
+import functools
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from users.models import Account
+
+from .models import Project
+
+
+def touch_accounts(*user_ids):
+    Account.objects.filter(user_id__in=user_ids).update(updated_at=timezone.now())
+
+
+def touch_projects(*pks):
+    Project.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+
+
+def deletions_key(kind):
+    return f'deletions:{kind}'
+
+
+def record_deletion(kind):
+    cache.set(deletions_key(kind), time.time_ns(), None)
+
+
+def deletions(kind):
+    # A lost marker restarts from the clock, so it can never match an ETag issued before a deletion.
+    return cache.get_or_set(deletions_key(kind), time.time_ns, None)
+
+
+def developers_modified(request):
+    return Account.objects.aggregate(updated=Max('updated_at'))['updated'], deletions('user')
+
+
+def projects_modified(request):
+    return Project.objects.aggregate(updated=Max('updated_at'))['updated'], deletions('project')
+
+
+def project_modified(request, id):
+    # Comments show their authors' names and avatars, which live on the author's account.
+    row = Project.objects.filter(pk=id).annotate(authors=Max('comment__author__account__updated_at'))\
+        .values_list('updated_at', 'user__account__updated_at', 'authors').first()
+    return (max(filter(None, row)), None) if row else None
+
+
+def profile_modified(request, username):
+    row = Account.objects.filter(user__username=username).annotate(
+        projects=Max('user__project__updated_at')
+    ).values_list('updated_at', 'projects').first()
+    return (max(filter(None, row)), None) if row else None
+
+
+def viewer(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    account = getattr(user, 'account', None)
+    return f'{user.pk}:{account.updated_at.isoformat() if account else ""}'
+
+
+def validators(request, modified, args, kwargs):
+    """Return (etag, last_modified timestamp) for the page, or (None, None) when it has none."""
+    result = modified(request, *args, **kwargs)
+    if result is None or result[0] is None:
+        return None, None
+    updated, version = result
+    # Forms on the page embed the CSRF secret, so a new cookie must miss.
+    parts = [updated.isoformat(), str(version), viewer(request), request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')]
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    last_modified = int(updated.timestamp())
+    if version is not None:
+        # The deletion marker is a time_ns, so a deletion moves Last-Modified forward like an update.
+        last_modified = max(last_modified, version // 10 ** 9)
+    return f'W/"{digest}"', last_modified
+
+
+def finish(request, response, etag, last_modified):
+    if etag is None or request.method not in ('GET', 'HEAD'):
+        return response
+    response.headers.setdefault('ETag', etag)
+    if not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(last_modified)
+    # Browsers must ask before reusing the page; logged-in pages stay out of shared caches.
+    if request.user.is_authenticated:
+        patch_cache_control(response, no_cache=True, private=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional_page(modified):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 from
+    ``modified(request, *args, **kwargs)``, which returns (updated_at, version)
+    or None for a page without validators.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                etag, last_modified = await sync_to_async(validators)(request, modified, args, kwargs)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return await sync_to_async(finish)(request, response, etag, last_modified)
+            return wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag, last_modified = validators(request, modified, args, kwargs)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return finish(request, response, etag, last_modified)
+        return wrapper
+    return decorator
@@ -0,0 +1,35 @@
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def rebuild_comment_counts(project_model=None, comment_model=None, using='default'):
+    if project_model is None:
+        from .models import Project as project_model
+    if comment_model is None:
+        from .models import Comment as comment_model
+
+    counts = comment_model.objects.using(using).filter(project=OuterRef('pk'))\
+        .order_by().values('project').annotate(total=Count('pk')).values('total')
+    return project_model.objects.using(using).update(comment_count=Coalesce(Subquery(counts), Value(0)))
+
+
+def rebuild_unread_counts(account_model=None, message_model=None, using='default'):
+    if account_model is None:
+        from users.models import Account as account_model
+    if message_model is None:
+        from .models import Message as message_model
+
+    counts = message_model.objects.using(using).filter(user_to=OuterRef('user'), is_read=False)\
+        .order_by().values('user_to').annotate(total=Count('pk')).values('total')
+    return account_model.objects.using(using).update(unread_count=Coalesce(Subquery(counts), Value(0)))
+
+
+def rebuild_tag_counts(tag_model=None, through_model=None, using='default'):
+    if tag_model is None:
+        from .models import Tag as tag_model
+    if through_model is None:
+        from .models import ProjectTag as through_model
+
+    counts = through_model.objects.using(using).filter(tag=OuterRef('pk'))\
+        .order_by().values('tag').annotate(total=Count('pk')).values('total')
+    return tag_model.objects.using(using).update(project_count=Coalesce(Subquery(counts), Value(0)))
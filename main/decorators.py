@@ -0,0 +1,76 @@
+import functools
+import logging
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('main.queries')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@contextmanager
+def recording(queries):
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(record))
+        yield
+
+
+def check_budget(view, queries, limit):
+    if len(queries) > limit:
+        message = f'{view.__module__}.{view.__name__} ran {len(queries)} queries (budget {limit})'
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message, extra={'queries': queries})
+
+
+def checked(request):
+    return getattr(settings, 'QUERY_BUDGET_CHECKS', False) and request.method in ('GET', 'HEAD')
+
+
+def query_budget(limit):
+    """
+    Warn, or raise when QUERY_BUDGET_STRICT is set, if a view runs more than
+    ``limit`` queries while rendering a GET or HEAD request.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if not checked(request):
+                    return await view(request, *args, **kwargs)
+
+                # The ORM runs on the request's sync thread, whose connections differ from the event loop's.
+                queries, stack = [], ExitStack()
+                await sync_to_async(stack.enter_context)(recording(queries))
+                try:
+                    response = await view(request, *args, **kwargs)
+                finally:
+                    await sync_to_async(stack.close)()
+                check_budget(view, queries, limit)
+                return response
+            return wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not checked(request):
+                return view(request, *args, **kwargs)
+
+            queries = []
+            with recording(queries):
+                response = view(request, *args, **kwargs)
+            check_budget(view, queries, limit)
+            return response
+        return wrapper
+    return decorator
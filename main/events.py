@@ -0,0 +1,89 @@
+"""
+Publish/subscribe for live notifications. ``EVENTS_BROKER`` names the backend
+class; the default LocalBroker only reaches subscribers in the same process,
+so multi-process deployments need a shared backend with the same interface.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+QUEUE_SIZE = 100
+
+_broker = None
+
+
+class LocalBroker:
+    """Delivers events to asyncio queues living in this process; publish() is safe to call from any thread."""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def deliver(queue, event):
+        if queue.full():
+            # A stalled client loses its oldest events rather than growing without bound.
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def listening(self, channel):
+        with self.lock:
+            return bool(self.subscribers.get(channel))
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self.deliver, queue, event)
+            except RuntimeError:
+                # The subscriber's event loop has already closed.
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(QUEUE_SIZE))
+        with self.lock:
+            self.subscribers[channel].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self.lock:
+                self.subscribers[channel].discard(subscriber)
+                if not self.subscribers[channel]:
+                    del self.subscribers[channel]
+
+
+def broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'EVENTS_BROKER', 'main.events.LocalBroker'))()
+    return _broker
+
+
+def inbox_channel(user_id):
+    return f'inbox:{user_id}'
+
+
+def listening(channel):
+    return broker().listening(channel)
+
+
+def publish(channel, event):
+    broker().publish(channel, event)
+
+
+def subscribe(channel):
+    return broker().subscribe(channel)
+
+
+def sse(data, retry=None):
+    """Format one server-sent event frame."""
+    frame = f'retry: {retry}\n' if retry is not None else ''
+    return frame + f'data: {json.dumps(data)}\n\n'
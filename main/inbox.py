@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.urls import reverse
+
+from users.models import Account
+
+from .events import inbox_channel, listening, publish
+from .models import Message
+
+
+def notify(user_id, message=None):
+    """Push the current unread count, and the new message if any, to the user's open inbox streams."""
+    if not listening(inbox_channel(user_id)):
+        return
+    event = {'unread': Account.objects.filter(user_id=user_id).values_list('unread_count', flat=True).first()}
+    if message is not None:
+        event['message'] = {
+            'id': message.id,
+            'url': reverse('message', args=[message.id]),
+            'author': f'{message.user_from.first_name} {message.user_from.last_name}',
+            'subject': message.subject,
+            'date': message.date.isoformat(),
+        }
+    publish(inbox_channel(user_id), event)
+
+
+def send_message(user_from, user_to, subject, text):
+    with transaction.atomic():
+        message = Message.objects.create(user_from=user_from, user_to=user_to, subject=subject, text=text)
+        Account.objects.filter(user=user_to).update(unread_count=F('unread_count') + 1)
+        transaction.on_commit(lambda: notify(user_to.pk, message))
+    return message
+
+
+def mark_read(message):
+    with transaction.atomic():
+        if Message.objects.filter(pk=message.pk, is_read=False).update(is_read=True):
+            Account.objects.filter(user_id=message.user_to_id, unread_count__gt=0)\
+                .update(unread_count=F('unread_count') - 1)
+            transaction.on_commit(lambda: notify(message.user_to_id))
+    message.is_read = True
+
+
+def mark_all_read(user):
+    with transaction.atomic():
+        Message.objects.filter(user_to=user, is_read=False).update(is_read=True)
+        Account.objects.filter(user=user).update(unread_count=0)
+        transaction.on_commit(lambda: notify(user.pk))
+
+
+def delete_messages(user, ids):
+    messages = Message.objects.filter(user_to=user, pk__in=ids)
+    with transaction.atomic():
+        unread = messages.filter(is_read=False).count()
+        messages.delete()
+        if unread:
+            Account.objects.filter(user=user).update(unread_count=Greatest(F('unread_count') - unread, 0))
+            transaction.on_commit(lambda: notify(user.pk))
+
+
+def release_sent_messages(user):
+    """Uncount a user's unread sent messages, which go with the user's cascade, from each recipient."""
+    sent = Message.objects.filter(user_from=user, is_read=False).exclude(user_to=user)
+    recipients = list(sent.values_list('user_to_id', flat=True).distinct())
+    if not recipients:
+        return
+    unread = sent.filter(user_to=OuterRef('user')).order_by().values('user_to').annotate(total=Count('pk')).values('total')
+    with transaction.atomic():
+        Account.objects.filter(user_id__in=recipients).update(
+            unread_count=Greatest(F('unread_count') - Subquery(unread), 0)
+        )
+        transaction.on_commit(lambda: [notify(pk) for pk in recipients])
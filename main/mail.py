@@ -0,0 +1,122 @@
+"""
+Outbound mail queue. With EMAIL_BACKEND set to QueueBackend, send_mail() and
+friends only insert a QueuedMail row. The row is part of the surrounding
+transaction, so mail from a rolled-back request is never sent. The
+send_queued_mail command delivers the rows through MAIL_QUEUE_BACKEND,
+which can be SMTP in production or the locmem or file backend in tests.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QueuedMail
+
+
+LEASE = timedelta(minutes=5)
+
+
+class QueueBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            if message.attachments:
+                raise ValueError('Queued mail cannot carry attachments')
+            if not message.recipients():
+                continue
+            rows.append(QueuedMail(
+                subject=message.subject,
+                body=message.body,
+                content_subtype=message.content_subtype,
+                from_email=message.from_email,
+                recipients={'to': message.to, 'cc': message.cc, 'bcc': message.bcc, 'reply_to': message.reply_to},
+                headers=message.extra_headers,
+                alternatives=[list(alternative) for alternative in getattr(message, 'alternatives', [])],
+            ))
+        QueuedMail.objects.bulk_create(rows)
+        return len(rows)
+
+
+def build_message(mail):
+    message = EmailMultiAlternatives(
+        mail.subject, mail.body, mail.from_email,
+        to=mail.recipients.get('to'), cc=mail.recipients.get('cc'), bcc=mail.recipients.get('bcc'),
+        reply_to=mail.recipients.get('reply_to'), headers=mail.headers,
+        alternatives=[tuple(alternative) for alternative in mail.alternatives],
+    )
+    message.content_subtype = mail.content_subtype
+    return message
+
+
+def retry_delay(attempts):
+    """Exponential backoff from MAIL_QUEUE_RETRY_DELAY seconds, capped at a day and spread by up to a quarter."""
+    delay = min(getattr(settings, 'MAIL_QUEUE_RETRY_DELAY', 60) * 2 ** (attempts - 1), 24 * 60 * 60)
+    return timedelta(seconds=delay * random.uniform(1, 1.25))
+
+
+def claim(batch_size):
+    """
+    Lease up to ``batch_size`` due messages by moving their next attempt past
+    LEASE, so concurrent workers skip them and a crashed worker's batch comes
+    back on its own.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            QueuedMail.objects.select_for_update(skip_locked=True)
+            .filter(next_attempt__lte=now).order_by('next_attempt', 'pk')[:batch_size]
+        )
+        QueuedMail.objects.filter(pk__in=[row.pk for row in rows]).update(next_attempt=now + LEASE)
+    return rows
+
+
+def deliver(rows, connection):
+    """Send ``rows`` over one open connection, reconnecting after a failure. Returns (sent, failed)."""
+    sent, failed = [], []
+    try:
+        connection.open()
+        for row in rows:
+            try:
+                connection.send_messages([build_message(row)])
+            except Exception as error:
+                failed.append((row, error))
+                connection.close()
+                connection.open()
+            else:
+                sent.append(row)
+    except Exception as error:
+        done = {row.pk for row in sent} | {row.pk for row, _ in failed}
+        failed += [(row, error) for row in rows if row.pk not in done]
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def send_queued(batch_size=100):
+    """Deliver one batch of due mail. Returns (sent, failed) counts; (0, 0) means the queue had nothing due."""
+    rows = claim(batch_size)
+    if not rows:
+        return 0, 0
+    try:
+        connection = get_connection(
+            getattr(settings, 'MAIL_QUEUE_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+        )
+    except ImportError as error:
+        # Recorded on every row like a refused message, so the lease does not hide it.
+        sent, failed = [], [(row, error) for row in rows]
+    else:
+        sent, failed = deliver(rows, connection)
+
+    QueuedMail.objects.filter(pk__in=[row.pk for row in sent]).delete()
+    max_attempts = getattr(settings, 'MAIL_QUEUE_MAX_ATTEMPTS', 8)
+    now = timezone.now()
+    for row, error in failed:
+        row.attempts += 1
+        row.next_attempt = now + retry_delay(row.attempts) if row.attempts < max_attempts else None
+        row.last_error = f'{type(error).__name__}: {error}'
+        row.save(update_fields=['attempts', 'next_attempt', 'last_error'])
+    return len(sent), len(failed)
@@ -0,0 +1,195 @@
+import json
+import platform
+import subprocess
+import time
+from contextlib import ExitStack
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+
+from main import urls as main_urls
+from main.models import Message, Project, Tag
+from users import urls as users_urls
+from users.models import Skill
+
+
+# Views that would end the benchmark session or only accept POST.
+SKIPPED = {'logout', 'mark-all-read', 'delete-messages'}
+SEARCHES = ('index', 'projects')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def url_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from url_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name, list(pattern.pattern.converters)
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, query count and SQL time of every view in main.urls and users.urls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--user', help='Username to authenticate as (default: the developer with most projects)')
+        parser.add_argument('--search', default='python', help='Query sent to the search pages')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--only', nargs='+', metavar='NAME', help='Benchmark only these URL names')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        self.options = options
+        user = self.bench_user(options['user'])
+        arguments = self.arguments(user)
+
+        anonymous = Client()
+        authenticated = Client()
+        authenticated.force_login(user)
+
+        results = []
+        for name, params in list(url_names(main_urls.urlpatterns)) + list(url_names(users_urls.urlpatterns)):
+            if name in SKIPPED or (options['only'] and name not in options['only']):
+                continue
+            values = arguments.get(name, {})
+            missing = [param for param in params if param not in values]
+            if missing:
+                self.stderr.write(f'Skipping {name}: no sample value for {", ".join(missing)}')
+                continue
+            url = reverse(name, kwargs={param: values[param] for param in params})
+            results.append(self.measure(name, 'anonymous', anonymous, 'get', url))
+            results.append(self.measure(name, 'authenticated', authenticated, 'get', url))
+            if name in SEARCHES:
+                data = {'q': options['search']}
+                results.append(self.measure(f'{name} [search]', 'anonymous', anonymous, 'get', url, data))
+
+        report = {
+            'created': timezone.now().isoformat(),
+            'commit': self.commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections['default'].vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'iterations': options['iterations'],
+            'cold': options['cold'],
+            'rows': {
+                'users': User.objects.count(),
+                'projects': Project.objects.count(),
+                'messages': Message.objects.count(),
+            },
+            'views': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.print_table(results)
+        else:
+            self.stdout.write(output)
+
+    def bench_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User {username!r} does not exist')
+        user = User.objects.annotate(projects=Count('project')).order_by('-projects', 'pk').first()
+        if user is None:
+            raise CommandError('The database is empty; run manage.py seed first')
+        return user
+
+    def arguments(self, user):
+        """Sample values for the URL converters, keyed by URL name."""
+        project = Project.objects.filter(user=user).order_by('-comment_count').first() or Project.objects.first()
+        message = Message.objects.filter(user_to=user).order_by('-date').first()
+        skill = Skill.objects.filter(account__user=user).first()
+        tag = Tag.objects.popular(1).first()
+        other = User.objects.exclude(pk=user.pk).order_by('pk').first() or user
+
+        def sample(**values):
+            return {key: value for key, value in values.items() if value is not None}
+
+        return {
+            'single-project': sample(id=project and project.pk),
+            'project-comments': sample(id=project and project.pk),
+            'tag-projects': sample(slug=tag and tag.slug),
+            'message': sample(id=message and message.pk),
+            'send-message': sample(user_id=other.pk),
+            'profile': sample(username=user.username),
+            'edit-skill': sample(id=skill and skill.pk),
+            'delete-skill': sample(id=skill and skill.pk),
+            'edit-project': sample(id=project and project.pk),
+            'delete-project': sample(id=project and project.pk),
+        }
+
+    def measure(self, name, client_name, client, method, url, data=None):
+        timings, queries, sql_times, statuses = [], [], [], set()
+
+        for iteration in range(self.options['warmup'] + self.options['iterations']):
+            if self.options['cold']:
+                cache.clear()
+
+            executed = []
+
+            def record(execute, sql, params, many, context):
+                start = time.perf_counter()
+                try:
+                    return execute(sql, params, many, context)
+                finally:
+                    executed.append(time.perf_counter() - start)
+
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(record))
+                start = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                elapsed = time.perf_counter() - start
+
+            if iteration >= self.options['warmup']:
+                timings.append(elapsed * 1000)
+                queries.append(len(executed))
+                sql_times.append(sum(executed) * 1000)
+                statuses.add(response.status_code)
+
+        return {
+            'view': name,
+            'client': client_name,
+            'method': method.upper(),
+            'url': url,
+            'status': sorted(statuses),
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'queries': max(queries),
+            'sql_ms': round(percentile(sql_times, 0.50), 3),
+        }
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def print_table(self, results):
+        self.stdout.write(f'{"view":<24} {"client":<14} {"status":<10} {"p50":>8} {"p95":>8} {"p99":>8} {"queries":>8} {"sql":>8}')
+        for row in results:
+            self.stdout.write(
+                f'{row["view"]:<24} {row["client"]:<14} {",".join(map(str, row["status"])):<10} '
+                f'{row["p50_ms"]:>8.2f} {row["p95_ms"]:>8.2f} {row["p99_ms"]:>8.2f} {row["queries"]:>8} {row["sql_ms"]:>8.2f}'
+            )
@@ -0,0 +1,145 @@
+import asyncio
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+
+from main.models import Project
+from .bench import percentile
+
+
+MODES = {
+    'wsgi': 'devSearch.urls',
+    'asgi-sync': 'devSearch.urls',
+    'asgi': 'devSearch.asgi_urls',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput of the WSGI entry point with the sync and async views under ASGI '
+        'by driving both handlers in-process at a fixed concurrency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per path and mode')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--paths', nargs='+', help='Paths to request (default: the async views)')
+        parser.add_argument('--anonymous', action='store_true', help='Send no session cookie, so the page cache answers')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        user = User.objects.annotate(projects=Count('project')).order_by('-projects', 'pk').first()
+        if user is None:
+            raise CommandError('The database is empty; run manage.py seed first')
+        project = Project.objects.order_by('-comment_count').first()
+
+        paths = options['paths'] or [
+            '/', '/projects/', f'/projects/{project.pk}' if project else None,
+            f'/users/profile/{user.username}', '/messages/',
+        ]
+        cookie = ''
+        if not options['anonymous']:
+            client = Client()
+            client.force_login(user)
+            cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+        results = []
+        for path in filter(None, paths):
+            for mode in options['modes']:
+                with override_settings(ROOT_URLCONF=MODES[mode]):
+                    run = self.run_wsgi if mode == 'wsgi' else self.run_asgi
+                    latencies, statuses, elapsed = run(path, cookie, options['concurrency'], options['requests'])
+                results.append({
+                    'path': path,
+                    'mode': mode,
+                    'concurrency': options['concurrency'],
+                    'requests': len(latencies),
+                    'status': sorted(set(statuses)),
+                    'throughput_rps': round(len(latencies) / elapsed, 1),
+                    'p50_ms': round(percentile(latencies, 0.50), 3),
+                    'p95_ms': round(percentile(latencies, 0.95), 3),
+                    'p99_ms': round(percentile(latencies, 0.99), 3),
+                })
+                self.stdout.write(
+                    f'{path:<40} {mode:<10} {results[-1]["throughput_rps"]:>9.1f} req/s  '
+                    f'p50 {results[-1]["p50_ms"]:>8.2f}  p99 {results[-1]["p99_ms"]:>8.2f}  {results[-1]["status"]}'
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({'database': settings.DATABASES['default']['ENGINE'], 'results': results}, file, indent=2)
+
+    def run_wsgi(self, path, cookie, concurrency, requests):
+        handler = WSGIHandler()
+        latencies, statuses = [], []
+
+        def call(_):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'REMOTE_ADDR': '127.0.0.1', 'HTTP_COOKIE': cookie,
+                'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO(), 'wsgi.url_scheme': 'http',
+            }
+            status = []
+            start = time.perf_counter()
+            response = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+            b''.join(response)
+            response.close()
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.append(int(status[0].split()[0]))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(call, range(requests)))
+        return latencies, statuses, time.perf_counter() - start
+
+    def run_asgi(self, path, cookie, concurrency, requests):
+        handler = ASGIHandler()
+        latencies, statuses = [], []
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+
+        async def call():
+            received = False
+
+            async def receive():
+                nonlocal received
+                if received:
+                    # Keep the connection open until the handler has sent the response.
+                    await asyncio.Future()
+                received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            start = time.perf_counter()
+            await handler(dict(scope), receive, send)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        async def worker(count):
+            for _ in range(count):
+                await call()
+
+        async def main():
+            share, extra = divmod(requests, concurrency)
+            await asyncio.gather(*(worker(share + (index < extra)) for index in range(concurrency)))
+
+        start = time.perf_counter()
+        asyncio.run(main())
+        return latencies, statuses, time.perf_counter() - start
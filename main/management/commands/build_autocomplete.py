@@ -0,0 +1,18 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import autocomplete
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search autocomplete snapshot that every worker loads its prefix index from'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        index = autocomplete.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {len(index)} record(s) under {len(index.keys)} key(s) in {time.perf_counter() - start:.2f}s '
+            f'to {settings.AUTOCOMPLETE_SNAPSHOT}'
+        ))
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.models import Project
+from main.pagecache import purge
+from main.renditions import build_renditions, executor, show_renditions
+from users.models import Account
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnail and WebP renditions for existing project images and avatars'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-encode renditions that already exist')
+
+    def handle(self, *args, **options):
+        names = set(Project.objects.exclude(image='').values_list('image', flat=True).distinct())
+        names |= set(Account.objects.exclude(avatar='').values_list('avatar', flat=True).distinct())
+
+        media_root = str(settings.MEDIA_ROOT)
+        futures = {executor().submit(build_renditions, name, media_root, options['force']): name for name in names}
+        written = 0
+        for future, name in futures.items():
+            try:
+                written += len(future.result())
+            except Exception as error:
+                self.stderr.write(f'{name}: {error}')
+
+        show_renditions(
+            names,
+            project_ids=Project.objects.filter(image__in=names).values_list('pk', flat=True),
+            user_ids=Account.objects.filter(avatar__in=names).values_list('user_id', flat=True),
+        )
+        purge('developers', 'projects')
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rendition(s) for {len(names)} image(s)'))
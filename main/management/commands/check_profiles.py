@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users import documents
+
+
+class Command(BaseCommand):
+    help = 'Compare the stored profile documents with fresh builds and report any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rebuild the documents found missing, stale or orphaned')
+
+    def handle(self, *args, **options):
+        missing, stale, orphaned = documents.check()
+        for label, pks in (('Missing', missing), ('Stale', stale), ('Orphaned', orphaned)):
+            if pks:
+                self.stdout.write(f'{label}: {len(pks)} document(s), user ids {", ".join(map(str, pks[:20]))}'
+                                  f'{" ..." if len(pks) > 20 else ""}')
+        if not (missing or stale or orphaned):
+            self.stdout.write(self.style.SUCCESS('All profile documents are up to date'))
+        elif options['fix']:
+            documents.refresh(*missing, *stale, *orphaned)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(missing) + len(stale) + len(orphaned)} document(s)'))
+        else:
+            raise CommandError('Profile documents are out of date; run again with --fix or run rebuild_profiles')
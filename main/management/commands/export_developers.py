@@ -0,0 +1,22 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from main.transfer import export_developers
+
+
+class Command(BaseCommand):
+    help = 'Stream every developer with their account, skills, links and projects as JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', help='File to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                count = export_developers(stream, options['chunk_size'])
+            self.stderr.write(self.style.SUCCESS(f'Exported {count} developer(s) to {options["output"]}'))
+        else:
+            count = export_developers(sys.stdout, options['chunk_size'])
+            self.stderr.write(self.style.SUCCESS(f'Exported {count} developer(s)'))
@@ -0,0 +1,77 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from main import autocomplete
+from main.counters import rebuild_tag_counts
+from main.pagecache import purge
+from main.transfer import ImportBatch
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load developers and their projects from a JSONL file written by export_developers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='JSONL file to read')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--checkpoint', help='Progress file (default: <input>.checkpoint)')
+        parser.add_argument('--resume', action='store_true', help='Continue after the last committed batch')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and insert every batch, then roll back')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint'] or f'{options["input"]}.checkpoint'
+        progress = {'offset': 0, 'line': 0, 'users': 0, 'projects': 0, 'errors': 0}
+        if options['resume']:
+            if not os.path.exists(checkpoint):
+                raise CommandError(f'No checkpoint at {checkpoint}')
+            with open(checkpoint) as file:
+                progress = json.load(file)
+            self.stdout.write(f'Resuming at line {progress["line"] + 1}')
+
+        self.options = options
+        self.checkpoint = checkpoint
+        with open(options['input'], 'rb') as stream:
+            stream.seek(progress['offset'])
+            batch = ImportBatch()
+            for line in stream:
+                progress['offset'] += len(line)
+                progress['line'] += 1
+                if line.strip():
+                    batch.add(progress['line'], line.decode('utf-8'))
+                if len(batch) >= options['batch_size']:
+                    self.flush(batch, progress)
+                    batch = ImportBatch()
+            self.flush(batch, progress)
+
+        if not options['dry_run']:
+            rebuild_tag_counts()
+            autocomplete.rebuild()
+            purge('developers', 'projects')
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {progress["users"]} developer(s) and {progress["projects"]} project(s), '
+            f'{progress["errors"]} invalid line(s)'
+        ))
+
+    def flush(self, batch, progress):
+        for line_number, error in batch.errors:
+            self.stderr.write(f'Line {line_number}: {error}')
+        progress['errors'] += len(batch.errors)
+
+        if self.options['dry_run']:
+            with transaction.atomic():
+                users, projects = batch.save()
+                transaction.set_rollback(True)
+        else:
+            users, projects = batch.save()
+        progress['users'] += users
+        progress['projects'] += projects
+
+        if not self.options['dry_run']:
+            temporary = f'{self.checkpoint}.tmp'
+            with open(temporary, 'w') as file:
+                json.dump(progress, file)
+            os.replace(temporary, self.checkpoint)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main.counters import rebuild_comment_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored Project.comment_count values from the comment table'
+
+    def handle(self, *args, **options):
+        projects = rebuild_comment_counts()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt comment counts for {projects} project(s)'))
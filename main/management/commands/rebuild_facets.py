@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from main.pagecache import purge
+from users.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = 'Resync the skill and location facets of every developer and recompute their counts'
+
+    def handle(self, *args, **options):
+        accounts = rebuild_facets()
+        purge('developers')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt facets for {accounts} account(s)'))
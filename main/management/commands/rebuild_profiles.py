@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users import documents
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored profile document of every developer'
+
+    def handle(self, *args, **options):
+        users = documents.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt profile documents for {users} user(s)'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from main import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from scratch'
+
+    def handle(self, *args, **options):
+        developers = search.rebuild_developers()
+        projects = search.rebuild_projects()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {developers} developer(s) and {projects} project(s)'))
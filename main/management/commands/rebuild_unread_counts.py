@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main.counters import rebuild_unread_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored Account.unread_count values from the message table'
+
+    def handle(self, *args, **options):
+        accounts = rebuild_unread_counts()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt unread counts for {accounts} account(s)'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from main import pagecache, recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored similar developers and related projects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every row instead of only the stale ones')
+
+    def handle(self, *args, **options):
+        refreshed = recommendations.refresh(full=options['full'])
+        tags = [f'user:{pk}' for pk in refreshed['developer']] + [f'project:{pk}' for pk in refreshed['project']]
+        for start in range(0, len(tags), 500):
+            pagecache.purge(*tags[start:start + 500])
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {len(refreshed["developer"])} developer(s) and {len(refreshed["project"])} project(s)'
+        ))
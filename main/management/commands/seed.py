@@ -0,0 +1,212 @@
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from main import autocomplete, search
+from main.counters import rebuild_comment_counts, rebuild_tag_counts, rebuild_unread_counts
+from main.models import Comment, Message, Project, ProjectTag, Tag, tag_slug
+from main.pagecache import purge
+from users import documents
+from users.facets import rebuild_facets
+from users.models import Account, Link, Skill
+
+
+FIRST_NAMES = (
+    'Alex', 'Maria', 'John', 'Anna', 'David', 'Elena', 'Michael', 'Sofia', 'Daniel', 'Olga',
+    'James', 'Laura', 'Ivan', 'Emma', 'Omar', 'Yuki', 'Lucas', 'Fatima', 'Mateo', 'Chen',
+)
+LAST_NAMES = (
+    'Smith', 'Ivanova', 'Garcia', 'Kim', 'Müller', 'Rossi', 'Novak', 'Silva', 'Khan', 'Tanaka',
+    'Brown', 'Petrov', 'Lopez', 'Nguyen', 'Dubois', 'Kowalski', 'Hansen', 'Ali', 'Cohen', 'Sato',
+)
+LOCATIONS = (
+    'Berlin, Germany', 'London, UK', 'New York, USA', 'Moscow, Russia', 'Tokyo, Japan',
+    'São Paulo, Brazil', 'Bangalore, India', 'Toronto, Canada', 'Warsaw, Poland', 'Dhaka, Bangladesh',
+)
+# Ordered by popularity; picks are Zipf-weighted so a few technologies dominate like on a real site.
+TECHNOLOGIES = (
+    'Python', 'JavaScript', 'Django', 'React', 'TypeScript', 'SQL', 'Docker', 'Go', 'Java', 'Node.js',
+    'PostgreSQL', 'Vue', 'C++', 'Rust', 'Kotlin', 'Swift', 'Flask', 'Redis', 'Kubernetes', 'C#',
+    'PHP', 'Ruby', 'GraphQL', 'AWS', 'Linux', 'Svelte', 'Elixir', 'Scala', 'Haskell', 'Terraform',
+)
+WORDS = (
+    'fast', 'simple', 'open', 'source', 'tool', 'library', 'service', 'api', 'dashboard', 'bot',
+    'parser', 'engine', 'platform', 'tracker', 'client', 'server', 'realtime', 'chat', 'game', 'editor',
+    'data', 'pipeline', 'search', 'cache', 'queue', 'monitor', 'scheduler', 'generator', 'app', 'web',
+)
+LINKS = (
+    ('GitHub', 'https://github.com/', 'im im-github'),
+    ('StackOverflow', 'https://stackoverflow.com/users/', 'im im-stackoverflow'),
+    ('LinkedIn', 'https://linkedin.com/in/', 'im im-linkedin'),
+    ('Twitter', 'https://twitter.com/', 'im im-twitter'),
+    ('Website', 'https://example.com/~', 'im im-globe'),
+)
+ZIPF = [1 / rank for rank in range(1, len(TECHNOLOGIES) + 1)]
+
+
+class Command(BaseCommand):
+    help = 'Generate realistic volumes of developers, projects, comments and messages for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--projects', type=float, default=2.0, help='Average number of projects per user')
+        parser.add_argument('--comments', type=float, default=4.0, help='Average number of comments per project')
+        parser.add_argument('--messages', type=float, default=10.0, help='Average number of messages per user')
+        parser.add_argument('--days', type=int, default=365, help='Spread creation dates over this many days')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--password', default='devnet', help='Password shared by every generated user')
+        parser.add_argument('--random-seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['random_seed'])
+        self.batch_size = options['batch_size']
+        self.days = max(options['days'], 1)
+
+        with transaction.atomic():
+            users = self.create_users(options['users'], options['password'])
+            self.create_profiles(users)
+            projects = self.create_projects(users, options['projects'])
+            comments = self.create_comments(users, projects, options['comments'])
+            messages = self.create_messages(users, options['messages'])
+
+        rebuild_comment_counts()
+        rebuild_unread_counts()
+        rebuild_tag_counts()
+        rebuild_facets()
+        search.rebuild_developers()
+        search.rebuild_projects()
+        documents.rebuild()
+        autocomplete.rebuild()
+        purge('developers', 'projects')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} user(s), {len(projects)} project(s), '
+            f'{comments} comment(s) and {messages} message(s)'
+        ))
+
+    def pick(self, count):
+        return list(dict.fromkeys(self.random.choices(TECHNOLOGIES, weights=ZIPF, k=count)))
+
+    def sentence(self, low, high):
+        return ' '.join(self.random.choices(WORDS, k=self.random.randint(low, high))).capitalize() + '.'
+
+    def long_tail(self, mean, cap):
+        # Pareto with alpha 2 has mean 2, so most rows get a few children and some get a lot.
+        return min(int(self.random.paretovariate(2) * mean / 2), cap)
+
+    def backdate(self, model, ages, datetime=False):
+        """Move rows back by their age in days, one UPDATE per distinct age."""
+        groups = defaultdict(list)
+        for pk, age in ages.items():
+            groups[age].append(pk)
+        today = timezone.localdate()
+        for age, pks in groups.items():
+            value = F('date') - timedelta(days=age) if datetime else today - timedelta(days=age)
+            for start in range(0, len(pks), self.batch_size):
+                model.objects.filter(pk__in=pks[start:start + self.batch_size]).update(date=value)
+
+    def create_users(self, count, password):
+        prefix = f'seed{User.objects.filter(username__startswith="seed").count()}'
+        password = make_password(password)
+        now = timezone.now()
+        users = []
+        for index in range(count):
+            username = f'{prefix}-{index}@example.com'
+            users.append(User(
+                username=username,
+                email=username,
+                password=password,
+                first_name=self.random.choice(FIRST_NAMES),
+                last_name=self.random.choice(LAST_NAMES),
+                date_joined=now - timedelta(days=self.random.randrange(self.days), seconds=self.random.randrange(86400))
+            ))
+        return User.objects.bulk_create(users, batch_size=self.batch_size)
+
+    def create_profiles(self, users):
+        accounts = Account.objects.bulk_create([
+            Account(
+                user=user,
+                summary=self.sentence(4, 10),
+                location=self.random.choice(LOCATIONS),
+                about=' '.join(self.sentence(6, 16) for _ in range(self.random.randint(1, 4))),
+                other_skills=', '.join(self.pick(self.random.randint(0, 4)))
+            )
+            for user in users
+        ], batch_size=self.batch_size)
+
+        skills, links = [], []
+        for account in accounts:
+            for name in self.pick(self.long_tail(3, 10)):
+                skills.append(Skill(account=account, name=name, description=self.sentence(5, 15)))
+            for name, url, icon in self.random.sample(LINKS, self.random.randint(0, len(LINKS))):
+                links.append(Link(account=account, name=name, link=f'{url}{account.user.pk}', icon=icon))
+        Skill.objects.bulk_create(skills, batch_size=self.batch_size)
+        Link.objects.bulk_create(links, batch_size=self.batch_size)
+
+    def create_projects(self, users, mean):
+        tags = {}
+        for name in TECHNOLOGIES:
+            tags[name], _ = Tag.objects.get_or_create(slug=tag_slug(name), defaults={'name': name})
+
+        projects, ages, names = [], [], []
+        for user in users:
+            joined = (timezone.now() - user.date_joined).days
+            for _ in range(self.long_tail(mean, 30)):
+                projects.append(Project(
+                    user=user,
+                    title=self.sentence(2, 5)[:-1],
+                    description=' '.join(self.sentence(8, 20) for _ in range(self.random.randint(1, 5))),
+                    link=f'https://github.com/{user.pk}/{len(projects)}',
+                    image='project_images/default.jpg'
+                ))
+                ages.append(self.random.randint(0, joined))
+                names.append(self.pick(self.random.randint(1, 5)))
+        projects = Project.objects.bulk_create(projects, batch_size=self.batch_size)
+
+        ProjectTag.objects.bulk_create([
+            ProjectTag(project=project, tag=tags[name])
+            for project, project_names in zip(projects, names) for name in project_names
+        ], batch_size=self.batch_size)
+        self.backdate(Project, {project.pk: age for project, age in zip(projects, ages)})
+        return projects
+
+    def create_comments(self, users, projects, mean):
+        comments, ages = [], []
+        for project in projects:
+            for _ in range(self.long_tail(mean, 200)):
+                comments.append(Comment(author=self.random.choice(users), project=project, text=self.sentence(3, 20)))
+                ages.append(self.random.randint(0, 30))
+        comments = Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+        self.backdate(Comment, {comment.pk: age for comment, age in zip(comments, ages)})
+        return len(comments)
+
+    def create_messages(self, users, mean):
+        if len(users) < 2:
+            return 0
+        # Popular developers receive most of the mail.
+        weights = [1 / rank for rank in range(1, len(users) + 1)]
+        recipients = self.random.choices(users, weights=weights, k=int(len(users) * mean))
+        messages, ages = [], []
+        for user_to in recipients:
+            user_from = self.random.choice(users)
+            if user_from == user_to:
+                continue
+            age = self.random.randint(0, 90)
+            messages.append(Message(
+                user_from=user_from,
+                user_to=user_to,
+                subject=self.sentence(2, 6),
+                text=' '.join(self.sentence(5, 20) for _ in range(self.random.randint(1, 3))),
+                is_read=age > 3 and self.random.random() < 0.9
+            ))
+            ages.append(age)
+        messages = Message.objects.bulk_create(messages, batch_size=self.batch_size)
+        self.backdate(Message, {message.pk: age for message, age in zip(messages, ages)}, datetime=True)
+        return len(messages)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main import mail
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound mail, retrying failures with exponential backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Messages sent over one connection')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue instead of exiting once it is empty')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls of an empty queue')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            close_old_connections()
+            sent, failed = mail.send_queued(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if failed:
+                self.stderr.write(f'{failed} message(s) failed and will be retried')
+            if sent or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Sent {total_sent} message(s), {total_failed} failure(s)'))
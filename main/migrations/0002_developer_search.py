@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import migrations
+
+from main.utils import split_list
+
+
+# The DDL and rows are written out here rather than taken from main.search, so later
+# changes to that module cannot change what this migration did.
+TABLES = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS main_developer_search "
+        "USING fts5(name, skills, body, tokenize='unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        'CREATE TABLE IF NOT EXISTS main_developer_search ('
+        'user_id integer PRIMARY KEY REFERENCES auth_user (id) ON DELETE CASCADE, '
+        'document tsvector NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS main_developer_search_document ON main_developer_search USING GIN (document)',
+    ],
+}
+
+INSERT = {
+    'sqlite': 'INSERT INTO main_developer_search (rowid, name, skills, body) VALUES (%s, %s, %s, %s)',
+    'postgresql': (
+        "INSERT INTO main_developer_search (user_id, document) VALUES (%s, "
+        "setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'C'))"
+    ),
+}
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in TABLES:
+        raise NotImplementedError(f'Full-text search is not available on {connection.vendor}')
+
+    Account = apps.get_model('users', 'Account')
+    User = apps.get_model('auth', 'User')
+    accounts = Account.objects.using(connection.alias).prefetch_related('skill_set')
+    accounts = {account.user_id: account for account in accounts}
+    rows = []
+    for user in User.objects.using(connection.alias).iterator():
+        account = accounts.get(user.pk)
+        skills, body = [], []
+        if account is not None:
+            skills = [skill.name for skill in account.skill_set.all()] + split_list(account.other_skills)
+            body = [account.summary, account.about]
+        rows.append((user.pk, f'{user.first_name} {user.last_name}', ' '.join(skills), ' '.join(filter(None, body))))
+
+    with connection.cursor() as cursor:
+        for statement in TABLES[connection.vendor]:
+            cursor.execute(statement)
+        cursor.executemany(INSERT[connection.vendor], rows)
+
+
+def drop_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS main_developer_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
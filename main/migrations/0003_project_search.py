@@ -0,0 +1,62 @@
+from django.db import migrations
+
+from main.utils import split_list
+
+
+# Written out here rather than taken from main.search; see 0002_developer_search.
+TABLES = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS main_project_search "
+        "USING fts5(title, tags, description, tokenize='unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        'CREATE TABLE IF NOT EXISTS main_project_search ('
+        'project_id bigint PRIMARY KEY REFERENCES main_project (id) ON DELETE CASCADE, '
+        'document tsvector NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS main_project_search_document ON main_project_search USING GIN (document)',
+    ],
+}
+
+INSERT = {
+    'sqlite': 'INSERT INTO main_project_search (rowid, title, tags, description) VALUES (%s, %s, %s, %s)',
+    'postgresql': (
+        "INSERT INTO main_project_search (project_id, document) VALUES (%s, "
+        "setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'C'))"
+    ),
+}
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in TABLES:
+        raise NotImplementedError(f'Full-text search is not available on {connection.vendor}')
+
+    Project = apps.get_model('main', 'Project')
+    rows = [
+        (pk, title, ' '.join(split_list(tags)), description)
+        for pk, title, tags, description in Project.objects.using(connection.alias)
+        .values_list('pk', 'title', 'tags', 'description').iterator()
+    ]
+
+    with connection.cursor() as cursor:
+        for statement in TABLES[connection.vendor]:
+            cursor.execute(statement)
+        cursor.executemany(INSERT[connection.vendor], rows)
+
+
+def drop_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS main_project_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_developer_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,95 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+from main.utils import split_list
+
+
+def tag_slug(name):
+    return slugify(name.replace('+', ' plus').replace('#', ' sharp'))
+
+
+def parse_tags(apps, schema_editor):
+    Project = apps.get_model('main', 'Project')
+    Tag = apps.get_model('main', 'Tag')
+    ProjectTag = apps.get_model('main', 'ProjectTag')
+    db = schema_editor.connection.alias
+
+    tags = {}
+    links = []
+    for project_id, text in Project.objects.using(db).values_list('id', 'tags_text').iterator():
+        slugs = set()
+        for name in split_list(text):
+            slug = tag_slug(name)
+            if not slug or slug in slugs:
+                continue
+            if slug not in tags:
+                tags[slug] = Tag(name=name[:50], slug=slug)
+            tags[slug].project_count += 1
+            slugs.add(slug)
+            links.append((project_id, slug))
+
+    Tag.objects.using(db).bulk_create(tags.values(), batch_size=500)
+    ids = dict(Tag.objects.using(db).values_list('slug', 'id'))
+    ProjectTag.objects.using(db).bulk_create(
+        [ProjectTag(project_id=project_id, tag_id=ids[slug]) for project_id, slug in links], batch_size=500
+    )
+
+
+def join_tags(apps, schema_editor):
+    Project = apps.get_model('main', 'Project')
+    db = schema_editor.connection.alias
+    for project in Project.objects.using(db).prefetch_related('tags'):
+        project.tags_text = ', '.join(tag.name for tag in project.tags.all())
+        project.save(update_fields=['tags_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_project_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Tag name')),
+                ('slug', models.SlugField(max_length=60, unique=True, verbose_name='Slug')),
+                ('project_count', models.PositiveIntegerField(default=0, verbose_name='Number of projects')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-project_count', 'name'], name='main_tag_popular_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.project')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'project'], name='main_projecttag_tag_idx')],
+                'constraints': [
+                    models.UniqueConstraint(fields=('project', 'tag'), name='main_projecttag_unique'),
+                ],
+            },
+        ),
+        migrations.RenameField(
+            model_name='project',
+            old_name='tags',
+            new_name='tags_text',
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='projects', through='main.ProjectTag', to='main.tag'),
+        ),
+        migrations.RunPython(parse_tags, join_tags),
+        migrations.RemoveField(
+            model_name='project',
+            name='tags_text',
+        ),
+    ]
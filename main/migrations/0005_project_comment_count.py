@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+from main.counters import rebuild_comment_counts
+
+
+def count_comments(apps, schema_editor):
+    rebuild_comment_counts(
+        apps.get_model('main', 'Project'), apps.get_model('main', 'Comment'), schema_editor.connection.alias
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Number of comments'),
+        ),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
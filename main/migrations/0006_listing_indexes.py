@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_project_comment_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-date', 'id'], name='main_project_date_id_idx'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX main_user_date_joined_id_idx ON auth_user (date_joined DESC, id)',
+            'DROP INDEX main_user_date_joined_id_idx',
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_message_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('developer', 'Developer'), ('project', 'Project')], max_length=10, verbose_name='Kind')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Object id')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='main_stalerecommendation_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedProject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Cosine similarity')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Rank')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_projects', to='main.project')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'rank'), name='main_relatedproject_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarDeveloper',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Cosine similarity')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Rank')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_developers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'rank'), name='main_similardeveloper_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedMail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=998, verbose_name='Subject')),
+                ('body', models.TextField(verbose_name='Body')),
+                ('content_subtype', models.CharField(default='plain', max_length=20, verbose_name='Content subtype')),
+                ('from_email', models.CharField(max_length=254, verbose_name='From')),
+                ('recipients', models.JSONField(verbose_name='Recipients')),
+                ('headers', models.JSONField(default=dict, verbose_name='Headers')),
+                ('alternatives', models.JSONField(default=list, verbose_name='Alternatives')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, null=True, verbose_name='Next attempt')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last error')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['next_attempt'], name='main_queuedmail_due_idx')],
+            },
+        ),
+    ]
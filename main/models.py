@@ -1,23 +1,89 @@
 from django.db import models
+from django.utils import timezone
+from django.utils.text import slugify
 
 from django.contrib.auth.models import User
 
+from .utils import split_list
+
+
+def tag_slug(name):
+    return slugify(name.replace('+', ' plus').replace('#', ' sharp'))
+
+
+class TagQuerySet(models.QuerySet):
+    def popular(self, limit=12):
+        return self.filter(project_count__gt=0).order_by('-project_count', 'name')[:limit]
+
+
+class Tag(models.Model):
+    name = models.CharField('Tag name', max_length=50)
+    slug = models.SlugField('Slug', max_length=60, unique=True)
+    project_count = models.PositiveIntegerField('Number of projects', default=0)
+
+    objects = TagQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-project_count', 'name'], name='main_tag_popular_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
 
 class Project(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField('Title', max_length=120)
     description = models.TextField('Description')
-    tags = models.TextField('Tags', null=True, blank=True, help_text='Comma-separated tags')
+    tags = models.ManyToManyField(Tag, through='ProjectTag', blank=True, related_name='projects')
     link = models.URLField('Source code link')
     image = models.ImageField('Project image', upload_to='project_images')
     date = models.DateField('Date of creation', auto_now_add=True)
+    comment_count = models.PositiveIntegerField('Number of comments', default=0, editable=False)
+    updated_at = models.DateTimeField('Updated at', auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date', 'id'], name='main_project_date_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user} - {self.title} Project'
 
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields'):
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
+        super().save(*args, **kwargs)
+
     @property
     def feedbackCount(self):
-        return f'{self.comment_set.count()} feedback(s)'
+        return f'{self.comment_count} feedback(s)'
+
+    def set_tags(self, names):
+        tags = []
+        for name in split_list(names):
+            slug = tag_slug(name)
+            if slug:
+                tag, _ = Tag.objects.get_or_create(slug=slug, defaults={'name': name[:50]})
+                tags.append(tag)
+        self.tags.set(tags)
+
+
+class ProjectTag(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'tag'], name='main_projecttag_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'project'], name='main_projecttag_tag_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.project} - {self.tag} Tag'
 
 
 class Comment(models.Model):
@@ -26,6 +92,11 @@ class Comment(models.Model):
     text = models.TextField('Text of comment')
     date = models.DateField('Date', auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'date', 'id'], name='main_comment_thread_idx'),
+        ]
+
     def __str__(self):
         return f'{self.author} Comment to {self.project}'
 
@@ -38,5 +109,81 @@ class Message(models.Model):
     is_read = models.BooleanField('Is read', default=False)
     date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_to', 'is_read', 'date'], name='main_message_unread_idx'),
+            models.Index(fields=['user_to', 'date'], name='main_message_inbox_idx'),
+        ]
+
     def __str__(self):
         return f'Message from {self.user_from} to {self.user_to}'
+
+
+class SimilarDeveloper(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='similar_developers')
+    similar = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField('Cosine similarity')
+    rank = models.PositiveSmallIntegerField('Rank')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'rank'], name='main_similardeveloper_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} ~ {self.similar}'
+
+
+class RelatedProject(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='related_projects')
+    related = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField('Cosine similarity')
+    rank = models.PositiveSmallIntegerField('Rank')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'rank'], name='main_relatedproject_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.project} ~ {self.related}'
+
+
+class StaleRecommendation(models.Model):
+    KINDS = (
+        ('developer', 'Developer'),
+        ('project', 'Project'),
+    )
+    kind = models.CharField('Kind', max_length=10, choices=KINDS)
+    object_id = models.PositiveBigIntegerField('Object id')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='main_stalerecommendation_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class QueuedMail(models.Model):
+    subject = models.CharField('Subject', max_length=998)
+    body = models.TextField('Body')
+    content_subtype = models.CharField('Content subtype', max_length=20, default='plain')
+    from_email = models.CharField('From', max_length=254)
+    recipients = models.JSONField('Recipients')
+    headers = models.JSONField('Headers', default=dict)
+    alternatives = models.JSONField('Alternatives', default=list)
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField('Attempts', default=0)
+    # Empty once the message has used up its attempts.
+    next_attempt = models.DateTimeField('Next attempt', null=True, default=timezone.now)
+    last_error = models.TextField('Last error', blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt'], name='main_queuedmail_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} to {", ".join(self.recipients.get("to", []))}'
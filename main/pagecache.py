@@ -0,0 +1,105 @@
+import functools
+import hashlib
+import re
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+
+TIMEOUT = 60 * 10
+CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = '\x00csrf\x00'
+COUNTERS = ('hits', 'misses', 'purges')
+
+
+def page_key(request):
+    return 'page:' + hashlib.sha1(request.get_full_path().encode()).hexdigest()
+
+
+def tag_key(tag):
+    return f'page-tag:{tag}'
+
+
+def count(counter, delta=1):
+    key = f'page-cache:{counter}'
+    if not cache.add(key, delta, None):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, None)
+
+
+def stats():
+    values = cache.get_many([f'page-cache:{counter}' for counter in COUNTERS])
+    return {counter: values.get(f'page-cache:{counter}', 0) for counter in COUNTERS}
+
+
+def tag_page(request, *tags):
+    """Record the objects shown on this page so that changing one of them purges it."""
+    request._page_tags = getattr(request, '_page_tags', set()) | set(tags)
+
+
+def purge(*tags):
+    index = cache.get_many([tag_key(tag) for tag in tags])
+    keys = set().union(*index.values()) if index else set()
+    cache.delete_many(list(keys) + [tag_key(tag) for tag in tags])
+    if keys:
+        count('purges', len(keys))
+
+
+def cached_response(request):
+    cached = cache.get(page_key(request))
+    if cached is None:
+        count('misses')
+        return None
+
+    count('hits')
+    content_type, content = cached
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Page-Cache'] = 'hit'
+    return response
+
+
+def store_response(request, response):
+    if response.status_code == 200 and not response.streaming and not response.cookies:
+        key = page_key(request)
+        content = CSRF_INPUT.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', response.content.decode(response.charset))
+        cache.set(key, (response['Content-Type'], content), TIMEOUT)
+        # Tag indexes are read-modify-write; a lost update only means the page lives until TIMEOUT.
+        tags = getattr(request, '_page_tags', ())
+        index = cache.get_many([tag_key(tag) for tag in tags])
+        cache.set_many({tag_key(tag): index.get(tag_key(tag), set()) | {key} for tag in tags}, TIMEOUT)
+        response['X-Page-Cache'] = 'miss'
+    return response
+
+
+def cache_anonymous_page(view):
+    """Serve anonymous GETs from a full-page cache, re-issuing the CSRF token on every hit."""
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or (await request.auser()).is_authenticated:
+                return await view(request, *args, **kwargs)
+
+            response = await sync_to_async(cached_response)(request)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+                response = await sync_to_async(store_response)(request, response)
+            return response
+        return wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        response = cached_response(request)
+        if response is None:
+            response = store_response(request, view(request, *args, **kwargs))
+        return response
+    return wrapper
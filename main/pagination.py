@@ -0,0 +1,167 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections, router
+from django.db.models import Q
+
+
+SALT = 'main.pagination'
+
+
+def encode_cursor(value):
+    return signing.dumps(value, salt=SALT, compress=True)
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        return signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        return None
+
+
+class CursorPage:
+    def __init__(self, object_list, number, per_page, next_cursor=None, previous_cursor=None, total=None):
+        self.object_list = object_list
+        self.number = number
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def page_count(self):
+        if self.total is None:
+            return None
+        return max((self.total + self.per_page - 1) // self.per_page, self.number)
+
+    @classmethod
+    def from_number(cls, object_list, number, per_page, total):
+        """Page over an already ranked sequence, such as search results."""
+        has_next = number * per_page < total
+        return cls(
+            object_list, number, per_page,
+            encode_cursor(['n', number + 1]) if has_next else None,
+            encode_cursor(['n', number - 1]) if number > 1 else None,
+            total
+        )
+
+
+def page_number(token):
+    cursor = decode_cursor(token)
+    if cursor and cursor[0] == 'n' and isinstance(cursor[1], int):
+        return max(cursor[1], 1)
+    return 1
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the last row of the previous page,
+    so deep pages cost the same as the first one. ``ordering`` must end with
+    a unique field, e.g. ``('-date', 'id')``.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    def _key(self, obj):
+        return [self.queryset.model._meta.get_field(name).value_to_string(obj) for name, _ in self.fields]
+
+    def _parse(self, key):
+        opts = self.queryset.model._meta
+        return [opts.get_field(name).to_python(value) for (name, _), value in zip(self.fields, key)]
+
+    def _seek(self, key, forward):
+        condition = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{name}__{lookup}': key[index]})
+            for position in range(index):
+                step &= Q(**{self.fields[position][0]: key[position]})
+            condition |= step
+        return condition
+
+    def _reversed(self):
+        return [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+
+    def _decode(self, token):
+        try:
+            direction, key, number = decode_cursor(token)
+            if direction in ('next', 'prev') and len(key) == len(self.fields):
+                return direction, self._parse(key), max(int(number), 1)
+        except (TypeError, ValueError, ValidationError):
+            pass
+        return 'first', None, 1
+
+    def _queryset(self, direction, key):
+        if direction == 'prev':
+            return self.queryset.filter(self._seek(key, False)).order_by(*self._reversed())[:self.per_page + 1]
+        queryset = self.queryset if key is None else self.queryset.filter(self._seek(key, True))
+        return queryset.order_by(*self.ordering)[:self.per_page + 1]
+
+    def _page(self, rows, direction, number, total):
+        more = len(rows) > self.per_page
+        if direction == 'prev':
+            rows = rows[:self.per_page][::-1]
+            if not more:
+                number = 1
+            has_next, has_previous = bool(rows), more
+        else:
+            rows = rows[:self.per_page]
+            has_next, has_previous = more, number > 1 and bool(rows)
+
+        return CursorPage(
+            rows, number, self.per_page,
+            encode_cursor(['next', self._key(rows[-1]), number + 1]) if has_next else None,
+            encode_cursor(['prev', self._key(rows[0]), number - 1]) if has_previous else None,
+            total
+        )
+
+    def get_page(self, token, total=None):
+        direction, key, number = self._decode(token)
+        return self._page(list(self._queryset(direction, key)), direction, number, total)
+
+    async def aget_page(self, token, total=None):
+        direction, key, number = self._decode(token)
+        rows = [obj async for obj in self._queryset(direction, key)]
+        return self._page(rows, direction, number, total)
+
+
+def estimated_count(model):
+    """Row count from planner statistics, or None when none have been gathered."""
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            elif connection.vendor == 'sqlite':
+                cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+                if not cursor.fetchone()[0]:
+                    return None
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+
+    if row is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    return count if count >= 0 else None
@@ -0,0 +1,240 @@
+"""
+"Similar developers" and "related projects" from skill and tag vectors.
+
+Every developer is described by their skills, other skills and the tags of
+their projects; every project by its tags and, more faintly, its owner's
+skills. Terms are TF-IDF weighted and rows L2-normalised, so cosine
+similarity is a plain dot product. Rows are kept sparse and multiplied in
+bounded blocks with NumPy. Results are stored in SimilarDeveloper and
+RelatedProject; requests only read them.
+"""
+import math
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from django.db import transaction
+from django.db.models import Count, Min
+
+from users.models import Account, Skill
+
+from .conditional import touch_accounts, touch_projects
+from .models import Project, ProjectTag, RelatedProject, SimilarDeveloper, StaleRecommendation, tag_slug
+from .utils import split_list
+
+
+TOP_K = 6
+# Rows multiplied at a time; each product is at most BATCH_SIZE x BATCH_SIZE
+BATCH_SIZE = 512
+# Terms beyond the most frequent MAX_TERMS still count towards a row's norm
+# but are left out of the matrix, which bounds its memory use.
+MAX_TERMS = 4096
+MIN_SCORE = 0.05
+
+PROJECT_TAG_WEIGHT = 0.5
+OWNER_SKILL_WEIGHT = 0.25
+
+
+def developer_documents():
+    documents = defaultdict(Counter)
+    for user_id, name in Skill.objects.values_list('account__user_id', 'name').iterator():
+        documents[user_id][tag_slug(name)] += 1
+    for user_id, other_skills in Account.objects.exclude(other_skills=None).values_list('user_id', 'other_skills').iterator():
+        for name in split_list(other_skills):
+            documents[user_id][tag_slug(name)] += 1
+    for user_id, slug in ProjectTag.objects.values_list('project__user_id', 'tag__slug').iterator():
+        documents[user_id][slug] += PROJECT_TAG_WEIGHT
+    return documents
+
+
+def project_documents(developers):
+    documents = defaultdict(Counter)
+    owners = dict(Project.objects.values_list('pk', 'user_id').iterator())
+    for project_id, slug in ProjectTag.objects.values_list('project_id', 'tag__slug').iterator():
+        documents[project_id][slug] += 1
+    for project_id, user_id in owners.items():
+        for slug, count in developers.get(user_id, {}).items():
+            documents[project_id][slug] += count * OWNER_SKILL_WEIGHT
+    return documents
+
+
+class SparseRows:
+    """Matrix rows in compressed sparse row form, expanded to dense arrays a bounded block at a time."""
+
+    def __init__(self, indptr, indices, data, width):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float32)
+        self.width = width
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def dense(self, rows):
+        """The given rows as a dense (len(rows), width) array."""
+        starts, counts = self.indptr[rows], self.indptr[rows + 1] - self.indptr[rows]
+        items = np.arange(counts.sum()) + np.repeat(starts - np.cumsum(counts) + counts, counts)
+        block = np.zeros((len(rows), self.width), dtype=np.float32)
+        block[np.repeat(np.arange(len(rows)), counts), self.indices[items]] = self.data[items]
+        return block
+
+    def blocks(self, size):
+        """Yield (start, stop, dense rows) for consecutive blocks of ``size`` rows."""
+        for start in range(0, len(self), size):
+            stop = min(start + size, len(self))
+            yield start, stop, self.dense(np.arange(start, stop))
+
+
+def build_matrix(documents):
+    """Return (ids, rows) with one unit-length TF-IDF row per document."""
+    documents = {pk: terms for pk, terms in documents.items() if any(terms)}
+    ids = sorted(documents)
+    frequency = Counter(slug for terms in documents.values() for slug in terms if slug)
+    # A term found in a single document cannot make two documents similar.
+    vocabulary = [slug for slug, count in frequency.most_common(MAX_TERMS) if count > 1]
+    columns = {slug: column for column, slug in enumerate(vocabulary)}
+
+    indptr, indices, data = [0], [], []
+    for pk in ids:
+        norm, row = 0.0, {}
+        for slug, count in documents[pk].items():
+            if not slug:
+                continue
+            weight = count * (math.log((1 + len(ids)) / (1 + frequency[slug])) + 1)
+            norm += weight * weight
+            if slug in columns:
+                row[columns[slug]] = weight
+        scale = 1 / math.sqrt(norm) if norm else 0.0
+        indices += row
+        data += [weight * scale for weight in row.values()]
+        indptr.append(len(indices))
+    return ids, SparseRows(indptr, indices, data, len(vocabulary))
+
+
+def similarities(matrix, rows):
+    """
+    Yield (batch, blocks) for every batch of ``rows``, where blocks yields
+    (start, stop, scores) for the batch against each block of the matrix.
+    """
+    def blocks(batch):
+        dense = matrix.dense(batch)
+        for start, stop, block in matrix.blocks(BATCH_SIZE):
+            scores = dense @ block.T
+            # A row is not its own neighbour.
+            scores[batch[:, None] == np.arange(start, stop)] = -1
+            yield start, stop, scores
+
+    for offset in range(0, len(rows), BATCH_SIZE):
+        batch = np.asarray(rows[offset:offset + BATCH_SIZE], dtype=np.int64)
+        yield batch, blocks(batch)
+
+
+def neighbours(ids, matrix, rows, k=TOP_K):
+    """Yield (id, [(neighbour id, score), ...]) for the given row indexes, best first."""
+    k = max(min(k, len(ids) - 1), 0)
+    for batch, blocks in similarities(matrix, rows):
+        # The best k scores so far, carried from block to block.
+        scores = np.empty((len(batch), 0), dtype=np.float32)
+        columns = np.empty((len(batch), 0), dtype=np.int64)
+        for start, stop, block in blocks:
+            scores = np.concatenate([scores, block], axis=1)
+            columns = np.concatenate([columns, np.broadcast_to(np.arange(start, stop), block.shape)], axis=1)
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k else np.empty((len(batch), 0), dtype=np.int64)
+                scores = np.take_along_axis(scores, top, axis=1)
+                columns = np.take_along_axis(columns, top, axis=1)
+        for position, row in enumerate(batch):
+            best = np.argsort(-scores[position], kind='stable')
+            yield ids[row], [(ids[columns[position, column]], float(scores[position, column])) for column in best
+                             if scores[position, column] >= MIN_SCORE]
+
+
+def reached(matrix, rows, floors):
+    """The row indexes, other than ``rows``, whose ``floors`` score one of ``rows`` reaches."""
+    found = set()
+    for batch, blocks in similarities(matrix, rows):
+        for start, stop, scores in blocks:
+            found.update((np.flatnonzero((scores >= floors[start:stop]).any(axis=0)) + start).tolist())
+    return found - set(rows)
+
+
+def stored_floors(model, source, ids, positions):
+    """
+    Per row, the score another row needs to enter its stored list: the lowest
+    stored score once the list is full, MIN_SCORE until then.
+    """
+    k = min(TOP_K, len(ids) - 1)
+    result = np.full(len(ids), MIN_SCORE, dtype=np.float32)
+    stored = model.objects.values(f'{source}_id').annotate(count=Count('pk'), low=Min('score'))\
+        .values_list(f'{source}_id', 'count', 'low')
+    for pk, count, low in stored.iterator():
+        if count >= k and pk in positions:
+            result[positions[pk]] = max(low, MIN_SCORE)
+    return result
+
+
+def store(model, source, target, results):
+    sources, rows = [], []
+    for pk, similar in results:
+        sources.append(pk)
+        rows += [model(**{f'{source}_id': pk, f'{target}_id': other, 'score': score, 'rank': rank})
+                 for rank, (other, score) in enumerate(similar, 1)]
+    for start in range(0, len(sources), BATCH_SIZE):
+        model.objects.filter(**{f'{source}_id__in': sources[start:start + BATCH_SIZE]}).delete()
+    model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return sources
+
+
+def mark_stale(kind, *ids):
+    StaleRecommendation.objects.bulk_create(
+        [StaleRecommendation(kind=kind, object_id=pk) for pk in ids], ignore_conflicts=True
+    )
+
+
+def refresh(full=False):
+    """
+    Recompute neighbours for every row, or only for rows marked stale, the
+    rows currently listing them and the rows they now belong in. Returns the
+    refreshed developer and project ids.
+    """
+    with transaction.atomic():
+        marks = list(StaleRecommendation.objects.values_list('pk', 'kind', 'object_id'))
+        # Marks added from here on are left for the next refresh.
+        for start in range(0, len(marks), BATCH_SIZE):
+            StaleRecommendation.objects.filter(pk__in=[mark[0] for mark in marks[start:start + BATCH_SIZE]]).delete()
+        stale = defaultdict(set)
+        if not full:
+            for _, kind, pk in marks:
+                stale[kind].add(pk)
+            stale['developer'] |= set(SimilarDeveloper.objects.filter(similar_id__in=stale['developer'])
+                                      .values_list('user_id', flat=True))
+            stale['project'] |= set(RelatedProject.objects.filter(related_id__in=stale['project'])
+                                    .values_list('project_id', flat=True))
+
+        developers = developer_documents()
+        refreshed = {}
+        for kind, documents, model, source, target in (
+            ('developer', developers, SimilarDeveloper, 'user', 'similar'),
+            ('project', project_documents(developers), RelatedProject, 'project', 'related'),
+        ):
+            if not full and not stale[kind]:
+                refreshed[kind] = []
+                continue
+            ids, matrix = build_matrix(documents)
+            positions = {pk: row for row, pk in enumerate(ids)}
+            if full:
+                wanted = list(range(len(ids)))
+                emptied = []
+                model.objects.all().delete()
+            else:
+                wanted = [positions[pk] for pk in stale[kind] if pk in positions]
+                wanted += sorted(reached(matrix, wanted, stored_floors(model, source, ids, positions)))
+                # Rows that lost every term keep no neighbours.
+                emptied = [(pk, []) for pk in stale[kind] if pk not in positions]
+            results = list(neighbours(ids, matrix, wanted)) + emptied
+            refreshed[kind] = store(model, source, target, results)
+        for start in range(0, len(refreshed['developer']), BATCH_SIZE):
+            touch_accounts(*refreshed['developer'][start:start + BATCH_SIZE])
+        for start in range(0, len(refreshed['project']), BATCH_SIZE):
+            touch_projects(*refreshed['project'][start:start + BATCH_SIZE])
+    return refreshed
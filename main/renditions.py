@@ -0,0 +1,145 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+
+logger = logging.getLogger('main.renditions')
+
+WIDTHS = (160, 320, 640)
+WEBP = 'webp'
+# Seconds the list of an image's renditions on disk is trusted; builds forget it when they finish
+RECORD_TIMEOUT = 60 * 60 * 24
+
+_executor = None
+
+
+def rendition_name(name, width, ext=None):
+    root, original_ext = os.path.splitext(name.lstrip('/'))
+    return f'renditions/{root}-{width}w.{ext or original_ext.lstrip(".").lower()}'
+
+
+def rendition_names(name):
+    """Every (width, name, webp_name) rendition of an image, smallest first."""
+    return [(width, rendition_name(name, width), rendition_name(name, width, WEBP)) for width in WIDTHS]
+
+
+def record_key(name):
+    return f'renditions:{name}'
+
+
+def existing_renditions(name):
+    """The rendition names of an image that exist on disk, looked up once and then recorded in the cache."""
+    present = cache.get(record_key(name))
+    if present is None:
+        present = [
+            rendition for _, name_original, name_webp in rendition_names(name) for rendition in (name_original, name_webp)
+            if os.path.exists(os.path.join(settings.MEDIA_ROOT, rendition))
+        ]
+        cache.set(record_key(name), present, RECORD_TIMEOUT)
+    return present
+
+
+def forget_renditions(*names):
+    cache.delete_many([record_key(name) for name in names])
+
+
+def build_renditions(name, media_root, force=False):
+    """Encode all renditions of one stored image. Runs in a worker process and never touches Django."""
+    from PIL import Image, ImageOps
+
+    with Image.open(os.path.join(media_root, name.lstrip('/'))) as original:
+        image = ImageOps.exif_transpose(original)
+        image_format = {'MPO': 'JPEG'}.get(original.format, original.format) or 'PNG'
+        written = []
+        for width, name_original, name_webp in rendition_names(name):
+            if width > image.width:
+                # Never upscale; a file here would be labelled wider than it is.
+                for target in (name_original, name_webp):
+                    if os.path.exists(os.path.join(media_root, target)):
+                        os.remove(os.path.join(media_root, target))
+                continue
+            height = max(round(image.height * width / image.width), 1)
+            resized = image.resize((width, height), Image.LANCZOS) if width < image.width else image
+            for target, target_format, options in (
+                (name_original, image_format, {'optimize': True, 'quality': 82}),
+                (name_webp, 'WEBP', {'quality': 80, 'method': 4}),
+            ):
+                path = os.path.join(media_root, target)
+                if os.path.exists(path) and not force:
+                    continue
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                frame = resized
+                if target_format == 'JPEG' and frame.mode not in ('RGB', 'L'):
+                    frame = frame.convert('RGB')
+                temporary = f'{path}.{os.getpid()}.tmp'
+                frame.save(temporary, target_format, **options)
+                os.replace(temporary, path)
+                written.append(target)
+    return written
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'RENDITION_WORKERS', 2),
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _executor
+
+
+def show_renditions(names, project_ids=(), user_ids=()):
+    """Show new renditions on the cards and pages of the projects and developers that own the images."""
+    from . import cards, conditional, pagecache
+
+    project_ids, user_ids = list(project_ids), list(user_ids)
+    forget_renditions(*names)
+    cards.bump('project', *project_ids)
+    cards.bump('developer', *user_ids)
+    conditional.touch_projects(*project_ids)
+    conditional.touch_accounts(*user_ids)
+    pagecache.purge(*(f'project:{pk}' for pk in project_ids), *(f'user:{pk}' for pk in user_ids))
+
+
+def finished(name, kind, pk):
+    """
+    Done callback of a build. It runs on the pool's management thread, so the
+    database and cache work is handed to a thread of its own.
+    """
+    def show():
+        try:
+            if kind == 'project':
+                show_renditions([name], project_ids=[pk])
+            else:
+                show_renditions([name], user_ids=[pk])
+        except Exception:
+            logger.exception('Could not show the renditions of %s', name)
+        finally:
+            connections.close_all()
+
+    def callback(future):
+        if future.exception() is not None:
+            logger.error('Rendition build failed', exc_info=future.exception())
+            return
+        threading.Thread(target=show, daemon=True).start()
+    return callback
+
+
+def schedule_renditions(field, kind, pk):
+    """
+    Queue rendition encoding for an image field once the current transaction
+    commits. ``kind`` and ``pk`` name the card that shows the image, 'project'
+    or 'developer' (by user pk).
+    """
+    if not field:
+        return
+    name, media_root = field.name, str(settings.MEDIA_ROOT)
+    transaction.on_commit(
+        lambda: executor().submit(build_renditions, name, media_root).add_done_callback(finished(name, kind, pk))
+    )
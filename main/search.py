@@ -0,0 +1,404 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .utils import split_list
+
+
+# Ranked ids kept in memory per search; pages past them run the search from an offset
+MAX_RESULTS = 1000
+BATCH_SIZE = 500
+
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+
+def query_terms(query):
+    return re.findall(r'\w+', (query or '').lower())[:10]
+
+
+def normalize_query(query):
+    """Terms are matched independently, so case, spacing, order and repeats do not change the results."""
+    return ' '.join(sorted(set(query_terms(query))))
+
+
+class ResultCache:
+    """
+    Ranked id lists per normalised query, least recently used first out.
+    Entries carry the index version they were computed at; any write to that
+    index moves the version on and retires them.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, entry_version, ids = entry
+            if entry_version != version or expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return ids
+
+    def set(self, key, version, ids):
+        timeout = getattr(settings, 'SEARCH_CACHE_TIMEOUT', 300)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, version, ids)
+            self.entries.move_to_end(key)
+            while len(self.entries) > getattr(settings, 'SEARCH_CACHE_SIZE', 500):
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+results = ResultCache()
+
+
+class Results:
+    """
+    The ranked ids of one search with the exact number of matches. The first
+    MAX_RESULTS ids are held in memory; slices reaching past them run the
+    search again from their offset. Only slicing is supported.
+    """
+
+    def __init__(self, head, total, fetch=None):
+        self.head, self.total, self.fetch = tuple(head), total, fetch
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        start, stop, _ = index.indices(self.total)
+        if stop <= len(self.head):
+            return self.head[start:stop]
+        return tuple(self.fetch(start, stop - start)) if start < stop else ()
+
+
+NO_RESULTS = Results((), 0)
+
+
+def version_key(name):
+    return f'search-version:{name}'
+
+
+def index_version(name):
+    # Shared through the cache, which main.checks requires to be shared, so a write
+    # in any process retires every process's results.
+    return cache.get_or_set(version_key(name), time.time_ns, None)
+
+
+def bump_version(name):
+    try:
+        cache.incr(version_key(name))
+    except ValueError:
+        cache.set(version_key(name), time.time_ns(), None)
+
+
+def cached_search(name, query, search):
+    """Results of ``search(terms, limit, offset)``, which returns (ranked ids, total matches)."""
+    normalized = normalize_query(query)
+    if not normalized:
+        return NO_RESULTS
+    terms = normalized.split()
+    version = index_version(name)
+    found = results.get((name, normalized), version)
+    if found is None:
+        head, total = search(terms, MAX_RESULTS, 0)
+        found = Results(head, total, lambda offset, limit: search(terms, limit, offset)[0])
+        results.set((name, normalized), version, found)
+    return found
+
+
+def highlight(snippet):
+    html = escape(snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+    return mark_safe(html)
+
+
+class SQLiteBackend:
+    """FTS5 shadow tables, ranked with bm25()."""
+
+    tables = {
+        'developers': "CREATE VIRTUAL TABLE IF NOT EXISTS main_developer_search "
+                      "USING fts5(name, skills, body, tokenize='unicode61 remove_diacritics 2')",
+        'projects': "CREATE VIRTUAL TABLE IF NOT EXISTS main_project_search "
+                    "USING fts5(title, tags, description, tokenize='unicode61 remove_diacritics 2')",
+    }
+
+    def create_index(self, cursor, name):
+        cursor.execute(self.tables[name])
+
+    def drop_index(self, cursor, name):
+        cursor.execute(f'DROP TABLE IF EXISTS main_{name[:-1]}_search')
+
+    def match(self, terms):
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def ranked(self, cursor, table, weights, terms, limit, offset):
+        # bm25() cannot be used next to a window function, so it is computed in a subquery.
+        cursor.execute(
+            f'SELECT rowid, count(*) OVER () FROM ('
+            f'SELECT rowid, bm25({table}, {weights}) AS score FROM {table} WHERE {table} MATCH %s'
+            f') ORDER BY score, rowid LIMIT %s OFFSET %s',
+            [self.match(terms), limit, offset]
+        )
+        rows = cursor.fetchall()
+        return [row[0] for row in rows], rows[0][1] if rows else 0
+
+    def write_developers(self, cursor, rows):
+        self.delete_developers(cursor, [row[0] for row in rows])
+        cursor.executemany(
+            'INSERT INTO main_developer_search (rowid, name, skills, body) VALUES (%s, %s, %s, %s)', rows
+        )
+
+    def delete_developers(self, cursor, user_ids):
+        cursor.executemany('DELETE FROM main_developer_search WHERE rowid = %s', [(pk,) for pk in user_ids])
+
+    def search_developers(self, cursor, terms, limit, offset=0):
+        return self.ranked(cursor, 'main_developer_search', '10.0, 4.0, 1.0', terms, limit, offset)
+
+    def write_projects(self, cursor, rows):
+        self.delete_projects(cursor, [row[0] for row in rows])
+        cursor.executemany(
+            'INSERT INTO main_project_search (rowid, title, tags, description) VALUES (%s, %s, %s, %s)', rows
+        )
+
+    def delete_projects(self, cursor, project_ids):
+        cursor.executemany('DELETE FROM main_project_search WHERE rowid = %s', [(pk,) for pk in project_ids])
+
+    def search_projects(self, cursor, terms, limit, offset=0):
+        return self.ranked(cursor, 'main_project_search', '10.0, 5.0, 1.0', terms, limit, offset)
+
+    def project_snippets(self, cursor, terms, project_ids):
+        cursor.execute(
+            'SELECT rowid, snippet(main_project_search, 2, %s, %s, \'…\', 24) FROM main_project_search '
+            f'WHERE main_project_search MATCH %s AND rowid IN ({", ".join(["%s"] * len(project_ids))})',
+            [HIGHLIGHT_START, HIGHLIGHT_STOP, self.match(terms), *project_ids]
+        )
+        return cursor.fetchall()
+
+
+class PostgresBackend:
+    """tsvector columns with GIN indexes, ranked with ts_rank()."""
+
+    tables = {
+        'developers': (
+            'user_id integer PRIMARY KEY REFERENCES auth_user (id) ON DELETE CASCADE, '
+            'document tsvector NOT NULL'
+        ),
+        'projects': (
+            'project_id bigint PRIMARY KEY REFERENCES main_project (id) ON DELETE CASCADE, '
+            'document tsvector NOT NULL'
+        ),
+    }
+
+    def create_index(self, cursor, name):
+        table = f'main_{name[:-1]}_search'
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {table} ({self.tables[name]})')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {table}_document ON {table} USING GIN (document)')
+
+    def drop_index(self, cursor, name):
+        cursor.execute(f'DROP TABLE IF EXISTS main_{name[:-1]}_search')
+
+    def match(self, terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def ranked(self, cursor, table, column, terms, limit, offset):
+        cursor.execute(
+            f"SELECT {column}, count(*) OVER () FROM {table}, to_tsquery('simple', %s) query "
+            f"WHERE document @@ query ORDER BY ts_rank(document, query) DESC, {column} LIMIT %s OFFSET %s",
+            [self.match(terms), limit, offset]
+        )
+        rows = cursor.fetchall()
+        return [row[0] for row in rows], rows[0][1] if rows else 0
+
+    def write_developers(self, cursor, rows):
+        cursor.executemany(
+            "INSERT INTO main_developer_search (user_id, document) VALUES (%s, "
+            "setweight(to_tsvector('simple', %s), 'A') || "
+            "setweight(to_tsvector('simple', %s), 'B') || "
+            "setweight(to_tsvector('simple', %s), 'C')) "
+            "ON CONFLICT (user_id) DO UPDATE SET document = EXCLUDED.document",
+            rows
+        )
+
+    def delete_developers(self, cursor, user_ids):
+        cursor.execute('DELETE FROM main_developer_search WHERE user_id = ANY(%s)', [list(user_ids)])
+
+    def search_developers(self, cursor, terms, limit, offset=0):
+        return self.ranked(cursor, 'main_developer_search', 'user_id', terms, limit, offset)
+
+    def write_projects(self, cursor, rows):
+        cursor.executemany(
+            "INSERT INTO main_project_search (project_id, document) VALUES (%s, "
+            "setweight(to_tsvector('simple', %s), 'A') || "
+            "setweight(to_tsvector('simple', %s), 'B') || "
+            "setweight(to_tsvector('simple', %s), 'C')) "
+            "ON CONFLICT (project_id) DO UPDATE SET document = EXCLUDED.document",
+            rows
+        )
+
+    def delete_projects(self, cursor, project_ids):
+        cursor.execute('DELETE FROM main_project_search WHERE project_id = ANY(%s)', [list(project_ids)])
+
+    def search_projects(self, cursor, terms, limit, offset=0):
+        return self.ranked(cursor, 'main_project_search', 'project_id', terms, limit, offset)
+
+    def project_snippets(self, cursor, terms, project_ids):
+        cursor.execute(
+            "SELECT id, ts_headline('simple', description, to_tsquery('simple', %s), %s) "
+            "FROM main_project WHERE id = ANY(%s)",
+            [
+                self.match(terms), f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=24, MinWords=12',
+                list(project_ids)
+            ]
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend(connection):
+    try:
+        return BACKENDS[connection.vendor]()
+    except KeyError:
+        raise NotImplementedError(f'Full-text search is not available on {connection.vendor}')
+
+
+def developer_row(user):
+    try:
+        account = user.account
+    except ObjectDoesNotExist:
+        account = None
+
+    skills, body = [], []
+    if account is not None:
+        skills = [skill.name for skill in account.skill_set.all()] + split_list(account.other_skills)
+        body = [account.summary, account.about]
+
+    return (
+        user.pk,
+        f'{user.first_name} {user.last_name}',
+        ' '.join(skills),
+        ' '.join(filter(None, body))
+    )
+
+
+def project_row(project):
+    tags = [tag.name for tag in project.tags.all()]
+    return (project.pk, project.title, ' '.join(tags), project.description)
+
+
+def _write(using, name, rows, ids):
+    missing = set(ids) - {row[0] for row in rows}
+    connection = connections[using]
+    backend = get_backend(connection)
+    with connection.cursor() as cursor:
+        if rows:
+            getattr(backend, f'write_{name}')(cursor, rows)
+        if missing:
+            getattr(backend, f'delete_{name}')(cursor, missing)
+    if rows or missing:
+        bump_version(name)
+
+
+def _rebuild(model, index, using):
+    pks = list(model.objects.using(using).values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        index(pks[start:start + BATCH_SIZE], model, using)
+    return len(pks)
+
+
+def index_developers(user_ids, user_model=None, using=DEFAULT_DB_ALIAS):
+    if user_model is None:
+        from django.contrib.auth.models import User as user_model
+
+    user_ids = set(user_ids)
+    users = user_model.objects.using(using).filter(pk__in=user_ids)\
+        .select_related('account').prefetch_related('account__skill_set')
+    _write(using, 'developers', [developer_row(user) for user in users], user_ids)
+
+
+def remove_developers(user_ids, using=DEFAULT_DB_ALIAS):
+    _write(using, 'developers', [], user_ids)
+
+
+def rebuild_developers(user_model=None, using=DEFAULT_DB_ALIAS):
+    if user_model is None:
+        from django.contrib.auth.models import User as user_model
+    return _rebuild(user_model, index_developers, using)
+
+
+def search_developers(query):
+    """Return the Results of the developers matching ``query``, best first."""
+    from django.contrib.auth.models import User
+
+    def run(terms, limit, offset):
+        connection = connections[router.db_for_read(User)]
+        with connection.cursor() as cursor:
+            return get_backend(connection).search_developers(cursor, terms, limit, offset)
+
+    return cached_search('developers', query, run)
+
+
+def index_projects(project_ids, project_model=None, using=DEFAULT_DB_ALIAS):
+    if project_model is None:
+        from .models import Project as project_model
+
+    project_ids = set(project_ids)
+    projects = project_model.objects.using(using).filter(pk__in=project_ids).prefetch_related('tags')
+    _write(using, 'projects', [project_row(project) for project in projects], project_ids)
+
+
+def remove_projects(project_ids, using=DEFAULT_DB_ALIAS):
+    _write(using, 'projects', [], project_ids)
+
+
+def rebuild_projects(project_model=None, using=DEFAULT_DB_ALIAS):
+    if project_model is None:
+        from .models import Project as project_model
+    return _rebuild(project_model, index_projects, using)
+
+
+def search_projects(query):
+    """Return the Results of the projects matching ``query``, best first."""
+    from .models import Project
+
+    def run(terms, limit, offset):
+        connection = connections[router.db_for_read(Project)]
+        with connection.cursor() as cursor:
+            return get_backend(connection).search_projects(cursor, terms, limit, offset)
+
+    return cached_search('projects', query, run)
+
+
+def project_snippets(query, project_ids):
+    """Return {id: highlighted description excerpt} for the given projects."""
+    from .models import Project
+
+    terms = query_terms(query)
+    if not terms or not project_ids:
+        return {}
+
+    connection = connections[router.db_for_read(Project)]
+    with connection.cursor() as cursor:
+        rows = get_backend(connection).project_snippets(cursor, terms, project_ids)
+    return {pk: highlight(snippet) for pk, snippet in rows}
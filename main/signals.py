@@ -0,0 +1,153 @@
+from django.db.models import F
+from django.utils import timezone
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from django.contrib.auth.models import User
+from users import documents
+
+from .models import Project, Tag, Comment
+from . import autocomplete, cards, conditional, pagecache, recommendations, search
+from .utils import cascaded
+
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, **kwargs):
+    search.index_projects([instance.pk])
+
+
+@receiver(post_delete, sender=Project)
+def unindex_project(sender, instance, **kwargs):
+    search.remove_projects([instance.pk])
+
+
+@receiver(pre_delete, sender=Project)
+def release_project_tags(sender, instance, **kwargs):
+    Tag.objects.filter(projects=instance).update(project_count=F('project_count') - 1)
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+def count_project_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        related = instance.projects if reverse else instance.tags
+        instance._cleared_tag_pks = set(related.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = instance._cleared_tag_pks
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if not pk_set:
+        return
+
+    delta = -1 if action in ('post_remove', 'post_clear') else 1
+    if reverse:
+        Tag.objects.filter(pk=instance.pk).update(project_count=F('project_count') + delta * len(pk_set))
+        project_ids = pk_set
+    else:
+        Tag.objects.filter(pk__in=pk_set).update(project_count=F('project_count') + delta)
+        project_ids = [instance.pk]
+
+    search.index_projects(project_ids)
+    recommendations.mark_stale('project', *project_ids)
+    recommendations.mark_stale('developer', *Project.objects.filter(pk__in=project_ids).values_list('user_id', flat=True))
+    cards.bump('project', *project_ids)
+    conditional.touch_projects(*project_ids)
+    pagecache.purge('projects', *(f'project:{pk}' for pk in project_ids))
+    documents.refresh_projects(*project_ids)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        Project.objects.filter(pk=instance.project_id).update(
+            comment_count=F('comment_count') + 1, updated_at=timezone.now()
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, origin=None, **kwargs):
+    # Comments going with their project need no count; users.signals.release_user_comments covers their author's.
+    if cascaded(origin, Project, User):
+        return
+    Project.objects.filter(pk=instance.project_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1, updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def refresh_project_card(sender, instance, **kwargs):
+    cards.bump('project', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def refresh_comment_card(sender, instance, origin=None, **kwargs):
+    if not cascaded(origin, Project, User):
+        cards.bump('project', instance.project_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def purge_project_pages(sender, instance, **kwargs):
+    pagecache.purge('projects', f'project:{instance.pk}', f'user:{instance.user_id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, origin=None, **kwargs):
+    if not cascaded(origin, Project, User):
+        pagecache.purge(f'project:{instance.project_id}')
+
+
+@receiver(post_delete, sender=Project)
+def touch_deleted_project_pages(sender, instance, **kwargs):
+    conditional.record_deletion('project')
+    conditional.touch_accounts(instance.user_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def complete_project(sender, instance, **kwargs):
+    if kwargs['signal'] is post_delete:
+        autocomplete.remove('project', instance.pk)
+    else:
+        autocomplete.put('project', instance.pk, instance.title, str(instance.pk))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def complete_tag(sender, instance, **kwargs):
+    if kwargs['signal'] is post_delete:
+        autocomplete.remove('tag', instance.pk)
+    else:
+        autocomplete.put('tag', instance.pk, instance.name, instance.slug)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def refresh_project_document(sender, instance, **kwargs):
+    documents.refresh(instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def refresh_comment_document(sender, instance, created=False, origin=None, **kwargs):
+    if created or (kwargs['signal'] is post_delete and not cascaded(origin, Project, User)):
+        documents.refresh_projects(instance.project_id)
+
+
+@receiver(post_save, sender=Tag)
+def refresh_tag_documents(sender, instance, created, **kwargs):
+    if not created:
+        documents.refresh(*Project.objects.filter(tags=instance).values_list('user_id', flat=True).distinct())
+
+
+@receiver(pre_delete, sender=Tag)
+def collect_tag_documents(sender, instance, **kwargs):
+    instance._document_user_ids = list(Project.objects.filter(tags=instance).values_list('user_id', flat=True).distinct())
+
+
+@receiver(post_delete, sender=Tag)
+def refresh_untagged_documents(sender, instance, **kwargs):
+    documents.refresh(*instance._document_user_ids)
@@ -0,0 +1,43 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from main.renditions import existing_renditions, rendition_names
+
+
+register = template.Library()
+
+
+def _srcsets(image):
+    present = set(existing_renditions(image.name))
+    original, webp = [], []
+    for width, name_original, name_webp in rendition_names(image.name):
+        if name_original in present:
+            original.append(f'{default_storage.url(name_original)} {width}w')
+        if name_webp in present:
+            webp.append(f'{default_storage.url(name_webp)} {width}w')
+    return ', '.join(original), ', '.join(webp)
+
+
+@register.simple_tag
+def srcset(image):
+    """The srcset of an image's existing renditions in its original format."""
+    if not image:
+        return ''
+    return _srcsets(image)[0]
+
+
+@register.simple_tag
+def picture(image, sizes='100vw', **attrs):
+    """A <picture> offering WebP and original-format renditions, falling back to the uploaded file."""
+    if not image:
+        return ''
+    original, webp = _srcsets(image)
+    attributes = format_html(' '.join(f'{key.replace("_", "-")}="{{}}"' for key in attrs), *attrs.values())
+    if not original:
+        return format_html('<img src="{}" {} />', image.url, attributes)
+    source = format_html('<source type="image/webp" srcset="{}" sizes="{}" />', webp, sizes) if webp else ''
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" {} /></picture>',
+        source, image.url, original, sizes, attributes
+    )
@@ -0,0 +1,725 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
+import numpy as np
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.core import mail as outbox
+from django.core.cache import cache
+from django.core.mail import send_mail
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+from devSearch import routers
+from users.models import Account, Skill
+
+from . import autocomplete, mail, recommendations, renditions, search, views
+from .counters import rebuild_comment_counts, rebuild_unread_counts
+from .inbox import delete_messages, mark_all_read, mark_read, send_message
+from .models import Comment, Message, Project, QueuedMail, SimilarDeveloper, StaleRecommendation, Tag
+from .pagination import encode_cursor
+from .transfer import ImportBatch
+
+
+PAGE_SIZES = (6, 60)
+
+
+def seed():
+    """Seeded developers plus one project and one inbox with more rows than the largest page."""
+    with mock.patch('main.autocomplete.rebuild'):
+        call_command('seed', users=100, projects=2, comments=2, messages=1, random_seed=6, stdout=StringIO())
+    users = list(User.objects.order_by('pk')[:2])
+    project = Project.objects.filter(user=users[0]).first()
+    Comment.objects.bulk_create(
+        [Comment(project=project, author=users[index % 2], text=f'Comment {index}') for index in range(70)]
+    )
+    Message.objects.bulk_create(
+        [Message(user_from=users[1], user_to=users[0], subject=f'Subject {index}', text='Hi') for index in range(70)]
+    )
+    rebuild_comment_counts()
+    rebuild_unread_counts()
+    return users[0], project
+
+
+@override_settings(QUERY_BUDGET_CHECKS=True, QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """Every budgeted view stays within its budget, and its query count does not grow with page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.project = seed()
+        cls.tag = Tag.objects.order_by('-project_count').first()
+        cls.message = Message.objects.filter(user_to=cls.user).first()
+
+    def setUp(self):
+        cache.clear()
+
+    def page(self, url, key, size):
+        cache.clear()
+        with mock.patch.multiple(views, PER_PAGE=size, COMMENTS_PER_PAGE=size, MESSAGES_PER_PAGE=size), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        if key:
+            self.assertEqual(len(response.context[key]), size)
+        return len(queries)
+
+    def assertFlatBudget(self, url, key=None):
+        self.assertEqual(len({self.page(url, key, size) for size in PAGE_SIZES}), 1)
+
+    def test_index(self):
+        self.assertFlatBudget(reverse('index'), 'users')
+
+    def test_projects(self):
+        self.assertFlatBudget(reverse('projects'), 'projects')
+
+    def test_tag_projects(self):
+        self.assertFlatBudget(reverse('tag-projects', args=[self.tag.slug]), 'projects')
+
+    def test_single_project(self):
+        self.assertFlatBudget(reverse('single-project', args=[self.project.pk]), 'comments')
+
+    def test_project_comments(self):
+        self.assertFlatBudget(reverse('project-comments', args=[self.project.pk]), 'comments')
+
+    def test_inbox(self):
+        self.client.force_login(self.user)
+        self.assertFlatBudget(reverse('inbox'), 'messages')
+
+    def test_single_message(self):
+        # Not paginated; the strict budget covers it, including marking the message read.
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('message', args=[self.message.pk])).status_code, 200)
+
+    def test_comment_post_is_not_budgeted(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('single-project', args=[self.project.pk]), {'message': 'Nice'})
+        self.assertRedirects(response, reverse('single-project', args=[self.project.pk]), fetch_redirect_response=False)
+
+
+@override_settings(ROOT_URLCONF='devSearch.asgi_urls', QUERY_BUDGET_CHECKS=True, QUERY_BUDGET_STRICT=True)
+class AsyncQueryBudgetTests(QueryBudgetTests):
+    """The same budgets for the native async views."""
+
+    def page(self, url, key, size):
+        with mock.patch('main.async_views.PER_PAGE', size), mock.patch('main.async_views.MESSAGES_PER_PAGE', size):
+            return super().page(url, key, size)
+
+
+class UnreadCountTests(TestCase):
+    def setUp(self):
+        self.sender, self.reader = User.objects.create(username='sender'), User.objects.create(username='reader')
+        self.messages = [send_message(self.sender, self.reader, 'Hi', f'Message {index}') for index in range(3)]
+
+    def assertUnread(self, count):
+        self.reader.account.refresh_from_db()
+        self.assertEqual(self.reader.account.unread_count, count)
+
+    def drift(self, count):
+        Account.objects.filter(user=self.reader).update(unread_count=count)
+
+    def test_send_and_mark_read(self):
+        self.assertUnread(3)
+        mark_read(self.messages[0])
+        mark_read(Message.objects.get(pk=self.messages[0].pk))
+        self.assertUnread(2)
+
+    def test_mark_all_read(self):
+        mark_read(self.messages[0])
+        mark_all_read(self.reader)
+        self.assertUnread(0)
+        self.assertFalse(Message.objects.filter(user_to=self.reader, is_read=False).exists())
+
+    def test_delete_messages(self):
+        mark_read(self.messages[0])
+        delete_messages(self.reader, [self.messages[0].pk, self.messages[1].pk])
+        self.assertUnread(1)
+        delete_messages(self.sender, [self.messages[2].pk])
+        self.assertUnread(1)
+
+    def test_drifted_counts_stop_at_zero(self):
+        self.drift(0)
+        mark_read(self.messages[0])
+        self.assertUnread(0)
+        self.drift(1)
+        delete_messages(self.reader, [self.messages[1].pk, self.messages[2].pk])
+        self.assertUnread(0)
+
+    def test_deleting_a_sender_uncounts_their_unread_messages(self):
+        send_message(self.reader, self.reader, 'Note', 'To self')
+        mark_read(self.messages[0])
+
+        self.sender.delete()
+        self.assertUnread(1)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='ada@example.com', first_name='Ada', last_name='Lovelace')
+        cls.project = Project.objects.create(user=cls.user, title='Engine', description='Analytical.')
+
+    def setUp(self):
+        cache.clear()
+
+    def assertRevalidates(self, url):
+        # The first response may set the CSRF cookie that later validators include.
+        self.client.get(url)
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_index(self):
+        self.assertRevalidates(reverse('index'))
+
+    def test_projects(self):
+        self.assertRevalidates(reverse('projects'))
+
+    def test_single_project(self):
+        self.assertRevalidates(reverse('single-project', args=[self.project.pk]))
+
+    def test_comment_author_changes_move_the_project_page(self):
+        author = User.objects.create(username='grace@example.com', first_name='Grace', last_name='Hopper')
+        Comment.objects.create(project=self.project, author=author, text='Nice')
+        url = reverse('single-project', args=[self.project.pk])
+        self.client.get(url)
+        etag = self.client.get(url)['ETag']
+
+        Account.objects.filter(user=author).update(updated_at=timezone.now() + timedelta(minutes=1))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_deletion_moves_last_modified(self):
+        response = self.client.get(reverse('projects'))
+        later = (parse_http_date(response['Last-Modified']) + 60) * 10 ** 9
+        with mock.patch('time.time_ns', return_value=later):
+            Project.objects.create(user=self.user, title='Loom', description='Woven.').delete()
+        response = self.client.get(reverse('projects'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(parse_http_date(response['Last-Modified']), later // 10 ** 9)
+
+
+@override_settings(QUERY_BUDGET_CHECKS=True, QUERY_BUDGET_STRICT=True)
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed()
+        with connection.cursor() as cursor:
+            cls.ranked, cls.total = search.get_backend(connection).search_projects(cursor, ['python'], 10 ** 6)
+
+    def setUp(self):
+        cache.clear()
+        search.results.clear()
+
+    @mock.patch('main.search.MAX_RESULTS', 10)
+    def test_results_past_the_cached_head(self):
+        results = search.search_projects('Python')
+        self.assertGreater(self.total, 20)
+        self.assertEqual(len(results), self.total)
+        self.assertEqual(list(results[0:self.total]), self.ranked)
+        self.assertEqual(list(results[12:18]), self.ranked[12:18])
+
+    @mock.patch('main.search.MAX_RESULTS', 10)
+    def test_last_page_past_the_cached_head(self):
+        last = -(-self.total // views.PER_PAGE)
+        response = self.client.get(reverse('projects'), {'q': 'python', 'cursor': encode_cursor(('n', last))})
+        page = response.context['projects']
+        self.assertEqual((page.number, page.total), (last, self.total))
+        self.assertEqual(list(page.object_list), self.ranked[(last - 1) * views.PER_PAGE:])
+
+
+class DeveloperSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        search.results.clear()
+
+    def developer(self, username, last_name='Lovelace', skill=None, about=''):
+        user = User.objects.create(username=username, first_name='Ada', last_name=last_name)
+        if skill:
+            Skill.objects.create(account=user.account, name=skill)
+        if about:
+            user.account.about = about
+            user.account.save()
+        return user
+
+    def test_names_rank_above_skills_above_the_body(self):
+        body = self.developer('body', about='Writes Rust on weekends.')
+        skill = self.developer('skill', skill='Rust')
+        name = self.developer('name', last_name='Rust')
+        self.developer('other', skill='Go')
+        self.assertEqual(list(search.search_developers('rust')[0:10]), [name.pk, skill.pk, body.pk])
+
+    def test_terms_match_prefixes_and_every_term(self):
+        user = self.developer('ada', skill='Django')
+        self.developer('grace', skill='Python')
+        self.assertEqual(list(search.search_developers('DJAN ada')[0:10]), [user.pk])
+        self.assertEqual(len(search.search_developers('django cobol')), 0)
+
+    def test_changes_reach_the_index(self):
+        user = self.developer('ada', skill='Django')
+        self.assertEqual(len(search.search_developers('django')), 1)
+        user.delete()
+        self.assertEqual(len(search.search_developers('django')), 0)
+
+
+class ProjectSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='ada@example.com', first_name='Ada', last_name='Lovelace')
+
+    def setUp(self):
+        cache.clear()
+        search.results.clear()
+
+    def project(self, title, description='A project.', tags=()):
+        project = Project.objects.create(user=self.user, title=title, description=description)
+        project.tags.set([Tag.objects.get_or_create(slug=tag.lower(), defaults={'name': tag})[0] for tag in tags])
+        return project
+
+    def test_titles_rank_above_tags_above_the_description(self):
+        description = self.project('Loom', description='A loom driven by a Rust service.')
+        tagged = self.project('Engine', tags=['Rust'])
+        titled = self.project('Rust engine')
+        self.project('Mill', tags=['Go'])
+        self.assertEqual(list(search.search_projects('rust')[0:10]), [titled.pk, tagged.pk, description.pk])
+
+    def test_snippets_highlight_the_terms(self):
+        project = self.project('Loom', description='Weaves <patterns> with punched cards.')
+        snippets = search.project_snippets('punched', [project.pk])
+        self.assertEqual(snippets[project.pk], 'Weaves &lt;patterns&gt; with <mark>punched</mark> cards.')
+
+
+class TagCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='ada@example.com')
+        self.projects = [Project.objects.create(user=self.user, title=f'Project {index}') for index in range(3)]
+        self.rust, self.go = Tag.objects.create(name='Rust', slug='rust'), Tag.objects.create(name='Go', slug='go')
+
+    def assertCounts(self, rust, go):
+        self.assertEqual(
+            (Tag.objects.get(pk=self.rust.pk).project_count, Tag.objects.get(pk=self.go.pk).project_count), (rust, go)
+        )
+
+    def test_add_and_remove(self):
+        self.projects[0].tags.add(self.rust, self.go)
+        self.projects[1].tags.add(self.rust)
+        self.assertCounts(2, 1)
+        self.projects[0].tags.remove(self.rust)
+        self.assertCounts(1, 1)
+
+    def test_add_and_remove_from_the_tag(self):
+        self.rust.projects.add(*self.projects)
+        self.assertCounts(3, 0)
+        self.rust.projects.remove(self.projects[0])
+        self.assertCounts(2, 0)
+
+    def test_clear(self):
+        self.projects[0].tags.add(self.rust, self.go)
+        self.projects[1].tags.add(self.rust)
+        self.projects[0].tags.clear()
+        self.assertCounts(1, 0)
+        self.rust.projects.clear()
+        self.assertCounts(0, 0)
+
+    def test_set(self):
+        self.projects[0].tags.set([self.rust])
+        self.projects[0].tags.set([self.go])
+        self.assertCounts(0, 1)
+
+    def test_project_delete(self):
+        self.projects[0].tags.add(self.rust, self.go)
+        self.projects[1].tags.add(self.rust)
+        self.projects[0].delete()
+        self.assertCounts(1, 0)
+
+    def test_owner_delete_cascades(self):
+        self.projects[0].tags.add(self.rust)
+        other = User.objects.create(username='grace@example.com')
+        Project.objects.create(user=other, title='Compiler').tags.add(self.rust)
+        self.user.delete()
+        self.assertCounts(1, 0)
+
+    def test_tag_delete_leaves_other_tags(self):
+        self.projects[0].tags.add(self.rust, self.go)
+        self.rust.delete()
+        self.assertEqual(Tag.objects.get(pk=self.go.pk).project_count, 1)
+        self.assertEqual(list(self.projects[0].tags.all()), [self.go])
+
+
+class RenditionTests(TestCase):
+    def build(self, width):
+        from PIL import Image
+
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        Image.new('RGB', (width, width)).save(os.path.join(media_root, 'photo.png'))
+        return sorted(renditions.build_renditions('photo.png', media_root))
+
+    def test_only_widths_the_image_reaches(self):
+        self.assertEqual(self.build(400), [
+            'renditions/photo-160w.png', 'renditions/photo-160w.webp',
+            'renditions/photo-320w.png', 'renditions/photo-320w.webp',
+        ])
+
+    def test_narrow_images_get_no_renditions(self):
+        self.assertEqual(self.build(100), [])
+
+    def test_finished_builds_are_shown_from_a_thread_of_their_own(self):
+        shown, threads = threading.Event(), []
+
+        def show(*args, **kwargs):
+            threads.append(threading.current_thread())
+            shown.set()
+
+        future = Future()
+        future.set_result([])
+        with mock.patch.object(renditions, 'show_renditions', show):
+            renditions.finished('photo.png', 'project', 1)(future)
+            self.assertTrue(shown.wait(5))
+        self.assertIsNot(threads[0], threading.current_thread())
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.path = os.path.join(self.directory, 'developers.jsonl')
+        self.enterContext(mock.patch('main.autocomplete.rebuild'))
+
+    def export(self):
+        call_command('export_developers', self.path, stderr=StringIO())
+        with open(self.path) as file:
+            return file.read().splitlines()
+
+    def load(self, *args):
+        stdout = StringIO()
+        call_command('import_developers', self.path, *args, stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def test_export_import_round_trip(self):
+        call_command('seed', users=8, projects=2, comments=0, messages=0, random_seed=6, stdout=StringIO())
+        exported = self.export()
+        User.objects.all().delete()
+        StaleRecommendation.objects.all().delete()
+
+        self.load()
+        self.assertEqual(self.export(), exported)
+        self.assertEqual(
+            StaleRecommendation.objects.filter(kind='developer').count(), User.objects.count()
+        )
+        self.assertEqual(StaleRecommendation.objects.filter(kind='project').count(), Project.objects.count())
+        for tag in Tag.objects.all():
+            self.assertEqual(tag.project_count, tag.projects.count())
+
+    def write(self, count):
+        with open(self.path, 'w') as file:
+            for index in range(count):
+                project = {
+                    'title': f'Project {index}', 'description': 'A project.', 'link': 'https://example.com',
+                    'image': 'project_images/default.jpg', 'tags': ['Rust'],
+                }
+                file.write(json.dumps({'username': f'dev{index}@example.com', 'projects': [project]}) + '\n')
+
+    def test_dry_run_rolls_back(self):
+        self.write(3)
+        self.assertIn('Validated 3 developer(s) and 3 project(s)', self.load('--dry-run', '--batch-size', '2'))
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_resume_after_a_failed_batch(self):
+        self.write(3)
+        save = ImportBatch.save
+        calls = []
+
+        def fail_second(batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError('Lost the database')
+            return save(batch)
+
+        with mock.patch.object(ImportBatch, 'save', fail_second), self.assertRaises(RuntimeError):
+            self.load('--batch-size', '1')
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['dev0@example.com'])
+
+        self.load('--batch-size', '1', '--resume')
+        self.assertEqual(
+            sorted(User.objects.values_list('username', flat=True)),
+            ['dev0@example.com', 'dev1@example.com', 'dev2@example.com']
+        )
+        self.assertEqual(Tag.objects.get().project_count, 3)
+
+
+class InboxEventsTests(TestCase):
+    def setUp(self):
+        self.sender, self.reader = User.objects.create(username='sender'), User.objects.create(username='reader')
+
+    async def test_stream_sends_the_count_then_new_messages(self):
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.get(reverse('inbox-events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(frames), b'retry: 3000\ndata: {"unread": 0}\n\n')
+
+            def send():
+                with self.captureOnCommitCallbacks(execute=True):
+                    return send_message(self.sender, self.reader, 'Hi', 'Hello')
+
+            message = await sync_to_async(send)()
+            event = json.loads((await asyncio.wait_for(anext(frames), 5)).decode().removeprefix('data: '))
+            self.assertEqual(event['unread'], 1)
+            self.assertEqual((event['message']['id'], event['message']['subject']), (message.pk, 'Hi'))
+        finally:
+            await frames.aclose()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    """A second SQLite entry on the test database stands in for a replica; the queries each one runs show the routing."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Added after the runner set up its databases, as a second connection to the test database.
+        connections.settings['replica'] = dict(connections['default'].settings_dict)
+        cls.databases = {'default', 'replica'}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        routers.health.down, routers.health.checked = set(), float('-inf')
+        self.user = User.objects.create_user('ada@example.com', password='engine')
+
+    def get(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(primary), len(replica)
+
+    def test_reads_go_to_the_replica(self):
+        primary, replica = self.get(reverse('projects'))
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_reads_after_a_write_stay_on_the_primary_while_the_cookie_lasts(self):
+        response = self.client.post(reverse('login'), {'email': 'ada@example.com', 'password': 'engine'})
+        self.assertIn(routers.STICKY_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[routers.STICKY_COOKIE]['max-age'], 5)
+
+        primary, replica = self.get(reverse('projects'))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        del self.client.cookies[routers.STICKY_COOKIE]
+        primary, replica = self.get(reverse('projects'))
+        self.assertGreater(replica, 0)
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.developers = {}
+        for name, skills in (('ada', ['Rust', 'Go']), ('grace', ['Rust', 'Go']), ('alan', ['Cobol', 'Fortran']),
+                             ('edsger', ['Cobol', 'Fortran'])):
+            self.developers[name] = User.objects.create(username=name)
+            for skill in skills:
+                Skill.objects.create(account=self.developers[name].account, name=skill, description='')
+        recommendations.refresh(full=True)
+
+    def similar(self, name):
+        return set(SimilarDeveloper.objects.filter(user=self.developers[name]).values_list('similar__username', flat=True))
+
+    def test_incremental_refresh_adds_changed_rows_to_other_panels(self):
+        self.assertEqual(self.similar('ada'), {'grace'})
+        alan = self.developers['alan']
+        alan.account.skill_set.all().delete()
+        Skill.objects.create(account=alan.account, name='Rust', description='')
+        Skill.objects.create(account=alan.account, name='Go', description='')
+
+        refreshed = recommendations.refresh()
+        self.assertEqual(self.similar('alan'), {'ada', 'grace'})
+        self.assertEqual(self.similar('ada'), {'grace', 'alan'})
+        self.assertEqual(self.similar('edsger'), set())
+        self.assertEqual(set(refreshed['developer']), {user.pk for user in self.developers.values()})
+
+    def test_marks_added_during_a_refresh_are_kept(self):
+        recommendations.mark_stale('developer', self.developers['ada'].pk)
+        documents = recommendations.developer_documents
+
+        def mark_and_read():
+            recommendations.mark_stale('developer', self.developers['grace'].pk)
+            return documents()
+
+        with mock.patch.object(recommendations, 'developer_documents', mark_and_read):
+            recommendations.refresh()
+        self.assertEqual(
+            list(StaleRecommendation.objects.values_list('object_id', flat=True)), [self.developers['grace'].pk]
+        )
+
+    def test_sparse_blocks_match_the_dense_product(self):
+        documents = {pk: {f'term{pk % 7}': 1, f'term{pk % 5}': 2, f'only{pk}': 1} for pk in range(1, 40)}
+        ids, matrix = recommendations.build_matrix(documents)
+        dense = matrix.dense(np.arange(len(ids)))
+        with mock.patch.object(recommendations, 'BATCH_SIZE', 8):
+            found = dict(recommendations.neighbours(ids, matrix, list(range(len(ids)))))
+        for row, pk in enumerate(ids):
+            scores = dense @ dense[row]
+            scores[row] = -1
+            expected = sorted((score for score in scores if score >= recommendations.MIN_SCORE), reverse=True)
+            self.assertEqual([round(score, 5) for _, score in found[pk]], [round(float(s), 5) for s in expected[:6]])
+
+
+@override_settings(
+    EMAIL_BACKEND='main.mail.QueueBackend', MAIL_QUEUE_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    MAIL_QUEUE_RETRY_DELAY=60, MAIL_QUEUE_MAX_ATTEMPTS=3,
+)
+class MailQueueTests(TestCase):
+    def send(self):
+        send_mail('Welcome', 'Hello', 'devnet@example.com', ['ada@example.com'], html_message='<p>Hello</p>')
+
+    def due(self):
+        QueuedMail.objects.update(next_attempt=timezone.now())
+
+    def test_mail_is_queued_with_its_transaction(self):
+        with transaction.atomic():
+            self.send()
+            transaction.set_rollback(True)
+        self.assertFalse(QueuedMail.objects.exists())
+        self.send()
+        self.assertEqual(QueuedMail.objects.count(), 1)
+        self.assertEqual(outbox.outbox, [])
+
+    def test_queued_mail_is_delivered(self):
+        self.send()
+        self.assertEqual(mail.send_queued(), (1, 0))
+        self.assertEqual(mail.send_queued(), (0, 0))
+        self.assertFalse(QueuedMail.objects.exists())
+        [message] = outbox.outbox
+        self.assertEqual((message.subject, message.to), ('Welcome', ['ada@example.com']))
+        self.assertEqual(message.alternatives, [('<p>Hello</p>', 'text/html')])
+
+    def test_refused_mail_backs_off(self):
+        self.send()
+        refused = SMTPRecipientsRefused({'ada@example.com': (550, b'No such user')})
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=refused):
+            for attempts, delay in ((1, 60), (2, 120)):
+                start = timezone.now()
+                self.assertEqual(mail.send_queued(), (0, 1))
+                row = QueuedMail.objects.get()
+                self.assertEqual(row.attempts, attempts)
+                self.assertTrue(row.last_error.startswith('SMTPRecipientsRefused'))
+                self.assertGreaterEqual(row.next_attempt - start, timedelta(seconds=delay))
+                self.assertLessEqual(row.next_attempt - start, timedelta(seconds=delay * 1.25 + 1))
+                self.assertEqual(mail.send_queued(), (0, 0))
+                self.due()
+            mail.send_queued()
+        row = QueuedMail.objects.get()
+        self.assertEqual((row.attempts, row.next_attempt), (3, None))
+
+    @override_settings(MAIL_QUEUE_BACKEND='main.missing.EmailBackend')
+    def test_unknown_backend_is_recorded(self):
+        self.send()
+        self.assertEqual(mail.send_queued(), (0, 1))
+        row = QueuedMail.objects.get()
+        self.assertEqual(row.attempts, 1)
+        self.assertIn('main.missing', row.last_error)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch.object(autocomplete, '_index', None))
+        self.rebuilds = self.enterContext(mock.patch('main.autocomplete._rebuild_in_background'))
+
+    def index(self, *records):
+        index = autocomplete.PrefixIndex.from_records(records)
+        index.checked = float('inf')
+        autocomplete._index = index
+        return index
+
+    def labels(self, query, **kwargs):
+        return [record[2] for record in autocomplete.search(query, **kwargs)]
+
+    def test_short_prefixes_find_the_heaviest_matches(self):
+        self.index(
+            *[('developer', pk, f'Aaron Smith{pk:03}', str(pk), 0) for pk in range(300)],
+            ('developer', 300, 'Zed Ada', '300', 5), ('tag', 1, 'Zebra', 'zebra', 9),
+        )
+        self.assertEqual(self.labels('a', limit=3), ['Zed Ada', 'Aaron Smith000', 'Aaron Smith001'])
+        self.assertEqual(self.labels('z', kinds=['developer'], limit=1), ['Zed Ada'])
+
+    @mock.patch('main.autocomplete.COMPACT_AT', 4)
+    def test_puts_and_removes(self):
+        index = self.index(('developer', 1, 'Ada Lovelace', 'ada', 1))
+        for pk in range(2, 8):
+            autocomplete.put('project', pk, f'Engine {pk}', str(pk), pk)
+        self.assertEqual(self.labels('eng', limit=2), ['Engine 7', 'Engine 6'])
+        self.assertLess(len(index.added), 4)
+
+        autocomplete.put('developer', 1, 'Ada King', 'ada')
+        self.assertEqual(self.labels('love'), [])
+        self.assertEqual(self.labels('king'), ['Ada King'])
+        autocomplete.put('developer', 1, 'ADA KING', 'ada', 20)
+        self.assertEqual(self.labels('e', limit=1), ['Engine 7'])
+        self.assertEqual(self.labels('a', limit=1), ['ADA KING'])
+
+        autocomplete.remove('project', 7)
+        self.assertEqual(self.labels('eng', limit=1), ['Engine 6'])
+        self.assertEqual(len(index), 6)
+
+    def test_changes_from_other_processes_are_replayed(self):
+        index = self.index(('developer', 1, 'Ada Lovelace', 'ada', 1))
+        autocomplete.publish(['put', 'developer', 2, 'Grace Hopper', 'grace', 3])
+        autocomplete.publish(['add_skill', 'Python'])
+        self.assertEqual(self.labels('gr'), ['Grace Hopper'])
+        self.assertEqual(self.labels('py'), ['Python'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            autocomplete.add_skill('python')
+        self.assertEqual(self.labels('py'), ['Python'])
+        self.assertEqual(index.record('skill', 'python')[4], 2)
+        self.assertEqual(index.version, 3)
+        self.rebuilds.assert_not_called()
+
+    def test_a_lost_change_rebuilds_the_index(self):
+        self.index(('developer', 1, 'Ada Lovelace', 'ada', 1))
+        autocomplete.publish(['remove', 'developer', 1])
+        cache.delete(autocomplete.change_key(1))
+        self.assertEqual(self.labels('ada'), ['Ada Lovelace'])
+        self.rebuilds.assert_called_once()
+
+    def test_snapshots_keep_their_version(self):
+        index = self.index(('developer', 1, 'Ada Lovelace', 'ada', 1), ('skill', 'python', 'Python', 'Python', 2))
+        index.put('tag', 3, 'Rust', 'rust', 4)
+        index.remove('developer', 1)
+        index.version = 7
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'autocomplete.snapshot')
+        index.dump(path)
+
+        loaded = autocomplete.PrefixIndex.load(path)
+        self.assertEqual(loaded.version, 7)
+        self.assertEqual([record[2] for record in loaded.search('r')], ['Rust'])
+        self.assertEqual(loaded.record('skill', 'python'), ['skill', 'python', 'Python', 'Python', 2])
+        self.assertIsNone(loaded.record('developer', 1))
@@ -0,0 +1,169 @@
+"""
+JSONL import and export of developers together with their account, skills,
+links and projects. One line holds one developer:
+
+    {"username": ..., "email": ..., "first_name": ..., "last_name": ..., "password": ...,
+     "date_joined": ..., "account": {...}, "skills": [...], "links": [...], "projects": [...]}
+"""
+import json
+from collections import defaultdict
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_date, parse_datetime
+
+from users import documents, facets
+from users.models import Account, Link, Skill
+
+from . import recommendations, search
+from .models import Project, ProjectTag, Tag, tag_slug
+
+
+ACCOUNT_FIELDS = ('avatar', 'summary', 'location', 'about', 'other_skills')
+SKILL_FIELDS = ('name', 'description')
+LINK_FIELDS = ('name', 'link', 'icon')
+PROJECT_FIELDS = ('title', 'description', 'link', 'image')
+
+
+def export_queryset():
+    return User.objects.select_related('account').prefetch_related(
+        'account__skill_set',
+        'account__link_set',
+        Prefetch('project_set', queryset=Project.objects.prefetch_related('tags').order_by('id')),
+    ).order_by('pk')
+
+
+def serialize_developer(user):
+    account = user.account
+    return {
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'password': user.password,
+        'date_joined': user.date_joined.isoformat(),
+        'account': {field: str(getattr(account, field) or '') for field in ACCOUNT_FIELDS},
+        'skills': [{field: getattr(skill, field) for field in SKILL_FIELDS} for skill in account.skill_set.all()],
+        'links': [{field: getattr(link, field) for field in LINK_FIELDS} for link in account.link_set.all()],
+        'projects': [
+            dict(
+                {field: str(getattr(project, field)) for field in PROJECT_FIELDS},
+                tags=[tag.name for tag in project.tags.all()],
+                date=project.date.isoformat(),
+            )
+            for project in user.project_set.all()
+        ],
+    }
+
+
+def export_developers(stream, chunk_size=500):
+    """Write every developer as one JSON line, holding at most ``chunk_size`` users in memory."""
+    count = 0
+    for user in export_queryset().iterator(chunk_size=chunk_size):
+        stream.write(json.dumps(serialize_developer(user), ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+class ImportBatch:
+    """A block of parsed JSONL records that is validated and written in one transaction."""
+
+    def __init__(self):
+        self.records = []
+        self.errors = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, line_number, line):
+        try:
+            record = json.loads(line)
+            user = User(
+                username=record['username'],
+                email=record.get('email', ''),
+                first_name=record.get('first_name', ''),
+                last_name=record.get('last_name', ''),
+                password=record.get('password') or make_password(None),
+            )
+            if record.get('date_joined'):
+                user.date_joined = parse_datetime(record['date_joined'])
+            user.clean_fields(exclude=['password'])
+
+            account = Account(**{field: record['account'][field] for field in ACCOUNT_FIELDS if field in record.get('account', {})})
+            skills = [Skill(**{field: skill[field] for field in SKILL_FIELDS}) for skill in record.get('skills', [])]
+            links = [Link(**{field: link[field] for field in LINK_FIELDS}) for link in record.get('links', [])]
+            projects = []
+            for data in record.get('projects', []):
+                project = Project(**{field: data[field] for field in PROJECT_FIELDS})
+                project.clean_fields(exclude=['user'])
+                projects.append((project, data.get('tags', []), parse_date(data['date']) if data.get('date') else None))
+            for obj in [account] + skills + links:
+                obj.clean_fields(exclude=['user', 'account'])
+        except (ValueError, KeyError, TypeError, ValidationError) as error:
+            self.errors.append((line_number, error))
+            return
+
+        self.records.append((user, account, skills, links, projects))
+
+    def save(self):
+        """Insert the batch, skipping usernames that already exist. Returns (users, projects) created."""
+        usernames = {record[0].username for record in self.records}
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        seen, records = set(existing), []
+        for record in self.records:
+            if record[0].username not in seen:
+                seen.add(record[0].username)
+                records.append(record)
+
+        with transaction.atomic():
+            users = User.objects.bulk_create([record[0] for record in records])
+            for user, account, skills, links, projects in records:
+                account.user = user
+            Account.objects.bulk_create([record[1] for record in records])
+
+            for user, account, skills, links, projects in records:
+                for obj in skills + links:
+                    obj.account = account
+                for project, _, _ in projects:
+                    project.user = user
+            Skill.objects.bulk_create([skill for record in records for skill in record[2]])
+            Link.objects.bulk_create([link for record in records for link in record[3]])
+
+            projects = [project for record in records for project in record[4]]
+            Project.objects.bulk_create([project for project, _, _ in projects])
+            self.save_tags(projects)
+
+            dates = defaultdict(list)
+            for project, _, date in projects:
+                if date is not None:
+                    dates[date].append(project.pk)
+            for date, pks in dates.items():
+                Project.objects.filter(pk__in=pks).update(date=date)
+
+            facets.sync_accounts([record[1].pk for record in records])
+            search.index_developers([user.pk for user in users])
+            search.index_projects([project.pk for project, _, _ in projects])
+            documents.refresh(*(user.pk for user in users))
+            recommendations.mark_stale('developer', *(user.pk for user in users))
+            recommendations.mark_stale('project', *(project.pk for project, _, _ in projects))
+
+        return len(users), len(projects)
+
+    def save_tags(self, projects):
+        names = {}
+        for _, tags, _ in projects:
+            for name in tags:
+                if tag_slug(name):
+                    names.setdefault(tag_slug(name), name[:50])
+        Tag.objects.bulk_create(
+            [Tag(slug=slug, name=name) for slug, name in names.items()], ignore_conflicts=True
+        )
+        tags = dict(Tag.objects.filter(slug__in=names).values_list('slug', 'pk'))
+        ProjectTag.objects.bulk_create([
+            ProjectTag(project=project, tag_id=tags[slug])
+            for project, names, _ in projects
+            for slug in dict.fromkeys(tag_slug(name) for name in names) if slug in tags
+        ])
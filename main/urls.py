@@ -6,8 +6,16 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('projects/', views.projects, name='projects'),
     path('projects/<int:id>', views.singleProject, name='single-project'),
+    path('projects/<int:id>/comments', views.projectComments, name='project-comments'),
+    path('projects/tag/<slug:slug>', views.tagProjects, name='tag-projects'),
+    path('autocomplete', views.autocomplete, name='autocomplete'),
 
     path('messages/', views.inbox, name='inbox'),
     path('messages/<int:id>', views.singleMessage, name='message'),
+    path('messages/events', views.inboxEvents, name='inbox-events'),
+    path('messages/mark-read', views.markAllRead, name='mark-all-read'),
+    path('messages/delete', views.deleteMessages, name='delete-messages'),
     path('messages/send/<int:user_id>', views.sendMessage, name='send-message'),
+
+    path('metrics/page-cache', views.pageCacheMetrics, name='page-cache-metrics'),
 ]
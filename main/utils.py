@@ -0,0 +1,82 @@
+import ast
+
+from django.db.models.fields.files import FieldFile
+
+
+def split_list(value):
+    """Return the items of a comma-separated string or a stringified Python list."""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        value = str(value).strip()
+        items = None
+        if value.startswith('['):
+            try:
+                items = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                value = value.strip('[]')
+        if not isinstance(items, (list, tuple)):
+            items = value.split(',')
+
+    result = []
+    for item in items:
+        item = str(item).strip().strip('\'"').strip()
+        if item and item not in result:
+            result.append(item)
+    return result
+
+
+def field_state(instance):
+    """Comparable values of the concrete fields currently loaded on ``instance``."""
+    state, deferred = {}, instance.get_deferred_fields()
+    for field in instance._meta.concrete_fields:
+        if field.attname in deferred:
+            continue
+        value = getattr(instance, field.attname)
+        if isinstance(value, FieldFile):
+            # A freshly assigned upload is uncommitted and never equal to the stored name.
+            state[field.attname] = value.name if value._committed else object()
+        else:
+            state[field.attname] = field.to_python(value)
+    return state
+
+
+def changed_fields(instance, state):
+    return [name for name, value in field_state(instance).items() if name not in state or state[name] != value]
+
+
+class DirtyFieldsMixin:
+    """Remember the field values as loaded or last saved, so save_changes() writes only edited columns."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_state = field_state(instance)
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._saved_state = field_state(self)
+
+    def changed_fields(self):
+        return changed_fields(self, getattr(self, '_saved_state', {}))
+
+    def save_changes(self):
+        if self._state.adding:
+            self.save()
+            return [field.attname for field in self._meta.concrete_fields]
+        fields = [name for name in self.changed_fields() if name != self._meta.pk.attname]
+        if fields:
+            self.save(update_fields=fields)
+        return fields
+
+
+def login_only(update_fields):
+    return update_fields is not None and set(update_fields) <= {'last_login'}
+
+
+def cascaded(origin, *models):
+    """Whether a delete reached this row through a cascade from one of ``models``."""
+    return isinstance(origin, models) or getattr(origin, 'model', None) in models
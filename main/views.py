@@ -1,85 +1,317 @@
-from django.http import HttpResponseForbidden
-from django.shortcuts import render, redirect
-from django.core.paginator import Paginator
+import asyncio
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import urlencode
 
 from django.contrib.auth.models import User
-from django.db.models import Q
 
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
+
+from users import facets
+from users.models import Account, Location, SkillTag
+
+from .cards import project_cards, render_cards
+from .conditional import conditional_page, developers_modified, project_modified, projects_modified
+from .decorators import query_budget
+from .events import inbox_channel, sse, subscribe
+from .inbox import send_message, mark_read, mark_all_read, delete_messages
+from .models import Project, Comment, Message, RelatedProject, Tag
+from .pagecache import cache_anonymous_page, tag_page, stats
+from .pagination import CursorPage, KeysetPaginator, estimated_count, page_number
+from . import autocomplete as typeahead, search
+
+
+EVENTS_KEEPALIVE = 15
+PER_PAGE = 6
+COMMENTS_PER_PAGE = 20
+MESSAGES_PER_PAGE = 20
+
+
+def search_redirect(request):
+    # Search used to be a POST form; forward old submissions to the cacheable GET URL.
+    return redirect(f'{request.path}?{urlencode({"q": request.POST.get("search", "")})}')
 
-from .models import Project, Message
+
+def search_page(ids, cursor):
+    number = page_number(cursor)
+    if (number - 1) * PER_PAGE >= len(ids):
+        number = 1
+    return CursorPage.from_number(list(ids[(number - 1) * PER_PAGE:number * PER_PAGE]), number, PER_PAGE, len(ids))
+
+
+def page_filters(request):
+    """The query string without its cursor, for pager links that keep the search and filters."""
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    return params.urlencode()
+
+
+def facet_url(request, key, slug):
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    values = params.getlist(key)
+    if slug in values:
+        values = [value for value in values if value != slug]
+    elif key == 'location':
+        values = [slug]
+    else:
+        values.append(slug)
+    params.setlist(key, values)
+    return f'?{params.urlencode()}'
 
 
+def developer_facets(request):
+    """
+    Skill and location chips with their toggle links, and the selected facets.
+    The selection is None when it names a facet that does not exist.
+    """
+    selected = {'skill': set(request.GET.getlist('skill')), 'location': set(request.GET.getlist('location')[:1])}
+    chips = {
+        'skill': facets.chips(SkillTag, selected['skill']),
+        'location': facets.chips(Location, selected['location']),
+    }
+    active = []
+    for key, facet_list in chips.items():
+        for facet in facet_list:
+            facet.active = facet.slug in selected[key]
+            facet.url = facet_url(request, key, facet.slug)
+            if facet.active:
+                active.append(facet)
+    if len(active) < len(selected['skill']) + len(selected['location']):
+        active = None
+    return chips, active
+
+
+def developer_list(active):
+    return User.objects.none() if active is None else facets.filter_developers(User.objects.all(), active)
+
+
+def filter_ids(ids, active):
+    """Keep the ranked search results that also have every selected facet."""
+    if active == []:
+        return ids
+    # Facets narrow the best search.MAX_RESULTS matches, which keeps the IN list bounded.
+    matching = set(developer_list(active).filter(pk__in=ids.head).values_list('pk', flat=True))
+    return [pk for pk in ids.head if pk in matching]
+
+
+def developer_total(active):
+    if not active:
+        return 0 if active is None else estimated_count(User)
+    return active[0].developer_count if len(active) == 1 else None
+
+
+def comment_paginator(project_id):
+    comments = Comment.objects.filter(project_id=project_id).select_related('author__account')
+    return KeysetPaginator(comments, COMMENTS_PER_PAGE, ('-date', '-id'))
+
+
+@conditional_page(developers_modified)
+@cache_anonymous_page
+@query_budget(9)
 def index(request):
     if request.method == 'POST':
-        search_data = request.POST.get('search')
-        users = User.objects.filter(Q(first_name__contains=search_data) | Q(last_name__contains=search_data))\
-            .order_by('-date_joined')
+        return search_redirect(request)
+    cursor, query = request.GET.get('cursor'), request.GET.get('q', '').strip()
+    chips, active = developer_facets(request)
+    if query:
+        page_users = search_page(filter_ids(search.search_developers(query), active), cursor)
+        page_ids = page_users.object_list
     else:
-        users = User.objects.order_by('-date_joined')
-
-    paginator = Paginator(users, 6)
-    page = request.GET.get('page', 1)
-    page_users = paginator.get_page(page)
+        paginator = KeysetPaginator(developer_list(active).only('id', 'date_joined'), PER_PAGE, ('-date_joined', 'id'))
+        page_users = paginator.get_page(cursor, developer_total(active))
+        page_ids = [user.pk for user in page_users]
 
-    return render(request, 'index.html', {'users': page_users})
+    tag_page(request, 'developers', *(f'user:{pk}' for pk in page_ids))
+    context = {
+        'users': page_users,
+        'cards': render_cards('developer', page_ids),
+        'query': query,
+        'filters': page_filters(request),
+        'skill_facets': chips['skill'],
+        'location_facets': chips['location']
+    }
+    return render(request, 'index.html', context)
 
 
+@conditional_page(projects_modified)
+@cache_anonymous_page
+@query_budget(6)
 def projects(request):
     if request.method == 'POST':
-        search_data = request.POST.get('search')
-        projects = Project.objects.filter(title__contains=search_data).order_by('-date')
+        return search_redirect(request)
+    cursor, query = request.GET.get('cursor'), request.GET.get('q', '').strip()
+    snippets = None
+    if query:
+        page_projects = search_page(search.search_projects(query), cursor)
+        page_ids = page_projects.object_list
+        snippets = search.project_snippets(query, page_ids)
     else:
-        projects = Project.objects.order_by('-date')
+        paginator = KeysetPaginator(Project.objects.only('id', 'date'), PER_PAGE, ('-date', 'id'))
+        page_projects = paginator.get_page(cursor, estimated_count(Project))
+        page_ids = [project.pk for project in page_projects]
+
+    tag_page(request, 'projects', *(f'project:{pk}' for pk in page_ids))
+    context = {
+        'projects': page_projects,
+        'cards': render_cards('project', page_ids, snippets),
+        'popular_tags': Tag.objects.popular(),
+        'query': query,
+        'filters': page_filters(request)
+    }
+    return render(request, 'projects.html', context)
 
-    paginator = Paginator(projects, 6)
-    page = request.GET.get('page', 1)
-    page_projects = paginator.get_page(page)
 
-    return render(request, 'projects.html', {'projects': page_projects})
+@cache_anonymous_page
+@query_budget(6)
+def tagProjects(request, slug):
+    tag = get_object_or_404(Tag, slug=slug)
+    paginator = KeysetPaginator(Project.objects.filter(tags=tag).only('id', 'date'), PER_PAGE, ('-date', 'id'))
+    page_projects = paginator.get_page(request.GET.get('cursor'), tag.project_count)
+    page_ids = [project.pk for project in page_projects]
 
+    tag_page(request, 'projects', *(f'project:{pk}' for pk in page_ids))
+    context = {
+        'projects': page_projects,
+        'cards': render_cards('project', page_ids),
+        'current_tag': tag,
+        'popular_tags': Tag.objects.popular()
+    }
+    return render(request, 'projects.html', context)
 
+
+@conditional_page(project_modified)
+@cache_anonymous_page
+@query_budget(7)
 def singleProject(request, id):
-    project = Project.objects.get(id=id)
     if request.method == 'POST':
+        project = get_object_or_404(Project, id=id)
         project.comment_set.create(
             author=request.user,
             text=request.POST.get('message')
         )
         return redirect('single-project', project.id)
 
-    return render(request, 'single-project.html', {'project': project})
+    project = get_object_or_404(project_cards(), id=id)
+    comments = comment_paginator(project.pk).get_page(request.GET.get('comments'))
+    authors = {project.user_id} | {comment.author_id for comment in comments}
+    related = RelatedProject.objects.filter(project=project).select_related('related').order_by('rank')
+    tag_page(request, f'project:{project.pk}', *(f'user:{pk}' for pk in authors))
+    return render(request, 'single-project.html', {
+        'project': project, 'comments': comments, 'related_projects': related
+    })
+
+
+@cache_anonymous_page
+@query_budget(1)
+def projectComments(request, id):
+    comments = comment_paginator(id).get_page(request.GET.get('cursor'))
+    tag_page(request, f'project:{id}', *(f'user:{comment.author_id}' for comment in comments))
+    return render(request, 'comments.html', {'comments': comments, 'project_id': id})
 
 
 @login_required(login_url='login')
+@query_budget(5)
 def inbox(request):
-    messages = Message.objects.filter(user_to=request.user).order_by('-date')
-    unread = messages.filter(is_read=False).count()
-    return render(request, 'inbox.html', {'messages': messages, 'unread': unread})
+    messages = Message.objects.filter(user_to=request.user).select_related('user_from')
+    paginator = KeysetPaginator(messages, MESSAGES_PER_PAGE, ('-date', '-id'))
+    page_messages = paginator.get_page(request.GET.get('cursor'))
+
+    unread = Account.objects.filter(user=request.user).values_list('unread_count', flat=True).first()
+    return render(request, 'inbox.html', {'messages': page_messages, 'unread': unread})
+
+
+@login_required(login_url='login')
+async def inboxEvents(request):
+    user = await request.auser()
+    unread = Account.objects.filter(user=user).values_list('unread_count', flat=True)
+
+    if not isinstance(request, ASGIRequest):
+        # A held-open stream would pin a WSGI worker, so send the count and let EventSource reconnect.
+        response = HttpResponse(sse({'unread': await unread.afirst()}, retry=30000), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    async def stream():
+        async with subscribe(inbox_channel(user.pk)) as queue:
+            yield sse({'unread': await unread.afirst()}, retry=3000)
+            while True:
+                try:
+                    yield sse(await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE))
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required(login_url='login')
+@require_POST
+def markAllRead(request):
+    mark_all_read(request.user)
+    return redirect('inbox')
+
+
+@login_required(login_url='login')
+@require_POST
+def deleteMessages(request):
+    delete_messages(request.user, [pk for pk in request.POST.getlist('messages') if pk.isdigit()])
+    return redirect('inbox')
 
 
 @login_required(login_url='login')
+@query_budget(5)
 def singleMessage(request, id):
-    message = Message.objects.get(id=id)
-    if message.user_to == request.user:
-        message.is_read = True
-        message.save()
+    message = get_object_or_404(Message.objects.select_related('user_from'), id=id)
+    if message.user_to_id == request.user.id:
+        mark_read(message)
         return render(request, 'message.html', {'message': message})
 
-    return HttpResponseForbidden
+    return HttpResponseForbidden()
 
 
 @login_required(login_url='login')
 def sendMessage(request, user_id):
-    user_to = User.objects.get(id=user_id)
+    user_to = get_object_or_404(User, id=user_id)
     if request.method == 'POST':
-        message = Message(
-            user_to=user_to,
-            user_from=request.user,
-            subject=request.POST.get('subject'),
-            text=request.POST.get('text')
-        )
-        message.save()
+        send_message(request.user, user_to, request.POST.get('subject'), request.POST.get('text'))
         return redirect('profile', user_to.username)
 
     return render(request, 'send-message.html', {'user_to': user_to})
+
+
+SUGGESTION_URLS = {
+    'developer': lambda value: reverse('profile', args=[value]),
+    'project': lambda value: reverse('single-project', args=[int(value)]),
+    'tag': lambda value: reverse('tag-projects', args=[value]),
+    'skill': lambda value: None,
+}
+
+
+def autocomplete(request):
+    kinds = [kind for kind in request.GET.get('kind', '').split(',') if kind in typeahead.KINDS]
+    results = typeahead.search(request.GET.get('q', '')[:100], kinds or typeahead.KINDS)
+    response = JsonResponse({'results': [
+        {'kind': kind, 'label': label, 'url': SUGGESTION_URLS[kind](value)}
+        for kind, _, label, value, _ in results
+    ]})
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
+def pageCacheMetrics(request):
+    if not (request.user.is_staff or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS):
+        return HttpResponseForbidden()
+
+    lines = []
+    for counter, value in stats().items():
+        lines += [f'# TYPE devnet_page_cache_{counter}_total counter', f'devnet_page_cache_{counter}_total {value}']
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4')
@@ -0,0 +1,52 @@
+(function () {
+  var input = document.querySelector('[data-autocomplete-url]');
+  if (!input || !window.fetch) {
+    return;
+  }
+
+  var list = document.getElementById(input.getAttribute('list'));
+  var urls = {};
+  var pending = null;
+  var timer = null;
+
+  function suggest() {
+    var query = input.value.trim();
+    if (!query) {
+      list.innerHTML = '';
+      return;
+    }
+    if (pending) {
+      pending.abort();
+    }
+    pending = new AbortController();
+    fetch(input.dataset.autocompleteUrl + '&q=' + encodeURIComponent(query), { signal: pending.signal })
+      .then(function (response) {
+        return response.json();
+      })
+      .then(function (data) {
+        list.innerHTML = '';
+        urls = {};
+        data.results.forEach(function (result) {
+          var option = document.createElement('option');
+          option.value = result.label;
+          list.appendChild(option);
+          if (result.url) {
+            urls[result.label] = result.url;
+          }
+        });
+      })
+      .catch(function () {});
+  }
+
+  input.addEventListener('input', function () {
+    clearTimeout(timer);
+    timer = setTimeout(suggest, 80);
+  });
+
+  // Picking a developer, project or tag opens it; skills stay in the box for a search.
+  input.addEventListener('change', function () {
+    if (urls[input.value]) {
+      window.location.href = urls[input.value];
+    }
+  });
+})();
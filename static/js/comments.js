@@ -0,0 +1,30 @@
+(function () {
+  var list = document.querySelector('.commentList');
+  if (!list || !window.fetch) {
+    return;
+  }
+
+  list.addEventListener('click', function (event) {
+    var more = event.target.closest('.comment__more');
+    if (!more) {
+      return;
+    }
+    event.preventDefault();
+    more.classList.add('comment__more--loading');
+    fetch(more.dataset.url, { credentials: 'same-origin' })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        more.insertAdjacentHTML('beforebegin', html);
+        more.remove();
+      })
+      .catch(function () {
+        // Fall back to the full page for this batch of comments.
+        window.location.href = more.href;
+      });
+  });
+})();
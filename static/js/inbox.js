@@ -0,0 +1,35 @@
+(function () {
+  var inbox = document.querySelector('[data-events-url]');
+  if (!inbox || !window.EventSource) {
+    return;
+  }
+
+  var counter = inbox.querySelector('.inbox__title span');
+  var list = inbox.querySelector('.messages');
+  var firstPage = !new URLSearchParams(window.location.search).has('cursor');
+
+  function messageItem(message) {
+    var item = document.createElement('li');
+    item.className = 'message message--unread';
+    item.innerHTML =
+      '<input class="message__select" type="checkbox" name="messages" />' +
+      '<a><span class="message__author"></span><span class="message__subject"></span>' +
+      '<span class="message__date"></span></a>';
+    item.querySelector('input').value = message.id;
+    item.querySelector('a').href = message.url;
+    item.querySelector('.message__author').textContent = message.author;
+    item.querySelector('.message__subject').textContent = message.subject;
+    item.querySelector('.message__date').textContent = new Date(message.date).toLocaleString();
+    return item;
+  }
+
+  new EventSource(inbox.dataset.eventsUrl).onmessage = function (event) {
+    var data = JSON.parse(event.data);
+    if (data.unread !== undefined && data.unread !== null) {
+      counter.textContent = data.unread;
+    }
+    if (data.message && firstPage) {
+      list.insertBefore(messageItem(data.message), list.firstChild);
+    }
+  };
+})();
@@ -1,7 +1,21 @@
 from django.contrib import admin
-from .models import Account, Link, Skill
+from .models import Account, Link, Location, ProfileDocument, Skill, SkillTag
 
 
 admin.site.register(Account)
 admin.site.register(Link)
 admin.site.register(Skill)
+
+
+@admin.register(SkillTag, Location)
+class FacetAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'developer_count')
+    readonly_fields = ('developer_count',)
+    search_fields = ('name',)
+
+
+@admin.register(ProfileDocument)
+class ProfileDocumentAdmin(admin.ModelAdmin):
+    list_display = ('username', 'updated_at')
+    readonly_fields = ('user', 'username', 'document', 'updated_at')
+    search_fields = ('username',)
@@ -0,0 +1,37 @@
+"""Native async versions of the read-heavy user views, routed by devSearch.asgi_urls."""
+from asgiref.sync import sync_to_async
+
+from django.http import Http404
+
+from . import documents
+from main.async_views import alist, arender
+from main.cards import render_cards
+from main.conditional import conditional_page, profile_modified
+from main.decorators import query_budget
+from main.pagecache import cache_anonymous_page, tag_page
+from main.models import SimilarDeveloper
+
+
+@conditional_page(profile_modified)
+@cache_anonymous_page
+@query_budget(8)
+async def profile(request, username):
+    document = await sync_to_async(documents.fetch)(username=username)
+    if document is None:
+        raise Http404('No such developer')
+    similar = await alist(
+        SimilarDeveloper.objects.filter(user_id=document['id']).select_related('similar__account').order_by('rank')
+    )
+    user, links, skills, projects = documents.unpack(document)
+    project_ids = [project.pk for project in projects]
+    tag_page(request, f'user:{user.pk}', *(f'project:{pk}' for pk in project_ids))
+    context = {
+        'user': user,
+        'links': links,
+        'skills': skills,
+        'similar_developers': similar,
+        'cards': await sync_to_async(render_cards)(
+            'project', project_ids, objects={project.pk: project for project in projects}
+        )
+    }
+    return await arender(request, 'profile.html', context)
@@ -0,0 +1,89 @@
+"""
+Request authentication that loads the user together with their account and
+keeps hot user rows in the cache for USER_CACHE_TIMEOUT seconds. The User
+and Account signals drop a cached row whenever either is saved or deleted,
+so a deactivation or password change reaches every process that shares the
+cache; main.checks refuses a process-local cache at deploy time.
+"""
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, load_backend
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+def user_key(pk):
+    return f'user:{pk}'
+
+
+def cached_user(pk):
+    user = cache.get(user_key(pk))
+    if user is None:
+        user = User.objects.select_related('account').filter(pk=pk).first()
+        if user is not None:
+            cache.set(user_key(pk), user, getattr(settings, 'USER_CACHE_TIMEOUT', 60))
+    return user
+
+
+def forget_user(*pks):
+    cache.delete_many([user_key(pk) for pk in pks])
+
+
+def get_user(request):
+    """django.contrib.auth.get_user(), reading users of the model backend through cached_user()."""
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    backend = load_backend(backend_path)
+    if isinstance(backend, ModelBackend):
+        user = cached_user(user_id)
+        if user is not None and not backend.user_can_authenticate(user):
+            user = None
+    else:
+        user = backend.get_user(user_id)
+    if user is None:
+        return AnonymousUser()
+
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    session_auth_hash = user.get_session_auth_hash()
+    if session_hash and constant_time_compare(session_hash, session_auth_hash):
+        return user
+    if session_hash and any(
+        constant_time_compare(session_hash, fallback) for fallback in user.get_session_auth_fallback_hash()
+    ):
+        request.session.cycle_key()
+        request.session[HASH_SESSION_KEY] = session_auth_hash
+        return user
+    request.session.flush()
+    return AnonymousUser()
+
+
+def memoized_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+async def amemoized_user(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(get_user)(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(partial(memoized_user, request))
+        request.auser = partial(amemoized_user, request)
@@ -0,0 +1,166 @@
+"""
+Denormalised profile snapshots. Each ProfileDocument row holds everything the
+profile and account pages show: the user and account fields, links, skills,
+other skills and the project cards with their tags and comment counts. The
+signals rebuild a user's row whenever one of those changes, so both pages
+render from a single indexed row fetch.
+
+Migration 0006 builds the rows of existing users. A user whose row is still
+missing is rendered from a document built on the fly, and ``manage.py
+check_profiles --fix`` stores it.
+"""
+from django.contrib.auth.models import User
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_date
+
+from main.models import Project, Tag
+from main.utils import split_list
+
+from .models import Account, Link, ProfileDocument, Skill
+
+
+BATCH_SIZE = 500
+
+# Users being deleted; their rows go with the cascade and must not be rebuilt midway.
+deleting = set()
+
+
+def profile_users():
+    return User.objects.select_related('account').prefetch_related(
+        Prefetch('account__link_set', Link.objects.order_by('pk')),
+        Prefetch('account__skill_set', Skill.objects.order_by('pk')),
+        Prefetch('project_set', Project.objects.order_by('-date', 'id').prefetch_related('tags')),
+    )
+
+
+def build(user):
+    account = user.account
+    return {
+        'id': user.pk,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'account': {
+            'avatar': account.avatar.name,
+            'summary': account.summary,
+            'location': account.location,
+            'about': account.about,
+            'other_skills': split_list(account.other_skills),
+        },
+        'links': [{'name': link.name, 'link': link.link, 'icon': link.icon} for link in account.link_set.all()],
+        'skills': [
+            {'id': skill.pk, 'name': skill.name, 'description': skill.description}
+            for skill in account.skill_set.all()
+        ],
+        'projects': [
+            {
+                'id': project.pk,
+                'title': project.title,
+                'description': project.description,
+                'image': project.image.name,
+                'date': project.date.isoformat(),
+                'comment_count': project.comment_count,
+                'tags': [[tag.name, tag.slug] for tag in project.tags.all()],
+            }
+            for project in user.project_set.all()
+        ],
+    }
+
+
+def build_many(users):
+    """Return {user pk: document} for the users in a queryset that have an account."""
+    users = profile_users().filter(pk__in=users.values('pk'), account__isnull=False)
+    return {user.pk: build(user) for user in users}
+
+
+def refresh(*user_ids):
+    """Rebuild the stored documents of the given users, dropping those of users that are gone."""
+    user_ids = set(user_ids) - deleting
+    if not user_ids:
+        return
+    documents = build_many(User.objects.filter(pk__in=user_ids))
+    ProfileDocument.objects.bulk_create(
+        [
+            ProfileDocument(user_id=pk, username=document['username'], document=document)
+            for pk, document in documents.items()
+        ],
+        update_conflicts=True, unique_fields=['user'], update_fields=['username', 'document', 'updated_at'],
+    )
+    missing = user_ids - documents.keys()
+    if missing:
+        ProfileDocument.objects.filter(user_id__in=missing).delete()
+
+
+def refresh_projects(*project_ids):
+    refresh(*Project.objects.filter(pk__in=project_ids).values_list('user_id', flat=True))
+
+
+def rebuild():
+    """Rebuild every user's document. Returns the number of users."""
+    pks = list(User.objects.values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        refresh(*pks[start:start + BATCH_SIZE])
+    ProfileDocument.objects.exclude(user_id__in=User.objects.values('pk')).delete()
+    return len(pks)
+
+
+def check():
+    """
+    Compare every stored document with a fresh build. Returns the user pks
+    whose document is missing, stale, or left behind by a deleted user.
+    """
+    missing, stale = [], []
+    pks = list(User.objects.values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        batch = pks[start:start + BATCH_SIZE]
+        documents = build_many(User.objects.filter(pk__in=batch))
+        stored = dict(ProfileDocument.objects.filter(user_id__in=batch).values_list('user_id', 'document'))
+        for pk, document in documents.items():
+            if pk not in stored:
+                missing.append(pk)
+            elif stored[pk] != document:
+                stale.append(pk)
+    orphaned = list(ProfileDocument.objects.exclude(user_id__in=User.objects.values('pk')).values_list('user_id', flat=True))
+    return missing, stale, orphaned
+
+
+def prefetched(instance, name, objects, model):
+    queryset = model.objects.all()
+    queryset._result_cache, queryset._prefetch_done = list(objects), True
+    instance._prefetched_objects_cache = {**getattr(instance, '_prefetched_objects_cache', {}), name: queryset}
+
+
+def unpack(document):
+    """
+    Turn a document into unsaved model instances shaped like the ones the
+    templates expect: a user with its account, links, skills and projects.
+    """
+    user = User(
+        pk=document['id'], username=document['username'],
+        first_name=document['first_name'], last_name=document['last_name']
+    )
+    user.account = Account(user=user, **document['account'])
+
+    links = [Link(account=user.account, **link) for link in document['links']]
+    skills = [Skill(account=user.account, **skill) for skill in document['skills']]
+    projects = []
+    for fields in document['projects']:
+        fields = dict(fields)
+        tags = [Tag(name=name, slug=slug) for name, slug in fields.pop('tags')]
+        project = Project(user=user, **{**fields, 'date': parse_date(fields['date'])})
+        prefetched(project, 'tags', tags, Tag)
+        projects.append(project)
+    prefetched(user.account, 'link_set', links, Link)
+    prefetched(user.account, 'skill_set', skills, Skill)
+    return user, links, skills, projects
+
+
+def fetch(**lookup):
+    """
+    Return the document of the user matching ``lookup`` (pk= or username=,
+    which both models share), or None when there is no such user.
+    """
+    document = ProfileDocument.objects.filter(**lookup).values_list('document', flat=True).first()
+    if document is None:
+        document = next(iter(build_many(User.objects.filter(**lookup)).values()), None)
+    return document
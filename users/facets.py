@@ -0,0 +1,150 @@
+"""
+Skill and location facets of the developer list. Skill names from the Skill
+rows and ``other_skills`` map to SkillTag rows, and the free-text location
+maps to a Location row. Each row keeps its developer count, which the
+signals adjust as accounts change, so the filter chips need no GROUP BY.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.text import slugify
+
+from main.models import tag_slug
+from main.utils import split_list
+
+from .models import Account, DeveloperSkill, Location, Skill, SkillTag
+
+
+BATCH_SIZE = 500
+
+
+def location_slug(name):
+    return slugify(name, allow_unicode=True)[:120]
+
+
+def location_name(text):
+    text = ' '.join((text or '').split())
+    if text == Account._meta.get_field('location').default:
+        return ''
+    return text[:100]
+
+
+def ensure(model, names):
+    """Return {slug: pk} for the given {slug: name}, creating missing rows."""
+    if not names:
+        return {}
+    model.objects.bulk_create([model(slug=slug, name=name) for slug, name in names.items()], ignore_conflicts=True)
+    return dict(model.objects.filter(slug__in=names).values_list('slug', 'pk'))
+
+
+def adjust(model, deltas):
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(developer_count=F('developer_count') + delta)
+
+
+def sync_accounts(account_ids):
+    """
+    Bring the skill and location facets of the given accounts in line with
+    their profiles. Returns {account pk: place pk} for accounts that moved.
+    """
+    accounts = list(Account.objects.filter(pk__in=account_ids).values_list('pk', 'location', 'other_skills', 'place_id'))
+    if not accounts:
+        return {}
+    account_ids = [row[0] for row in accounts]
+
+    skill_names, wanted_skills = {}, defaultdict(set)
+    names = list(Skill.objects.filter(account_id__in=account_ids).values_list('account_id', 'name'))
+    names += [(pk, name) for pk, _, other_skills, _ in accounts for name in split_list(other_skills)]
+    for pk, name in names:
+        slug = tag_slug(name)
+        if slug:
+            skill_names.setdefault(slug, name[:50])
+            wanted_skills[pk].add(slug)
+
+    location_names, wanted_places = {}, {}
+    for pk, text, _, _ in accounts:
+        name = location_name(text)
+        slug = location_slug(name)
+        if slug:
+            location_names.setdefault(slug, name)
+            wanted_places[pk] = slug
+
+    skill_ids, location_ids = ensure(SkillTag, skill_names), ensure(Location, location_names)
+
+    wanted = {(pk, skill_ids[slug]) for pk, slugs in wanted_skills.items() for slug in slugs}
+    current = set(DeveloperSkill.objects.filter(account_id__in=account_ids).values_list('account_id', 'skill_id'))
+    removed, added = current - wanted, wanted - current
+
+    removed_by_account = defaultdict(list)
+    for pk, skill_id in removed:
+        removed_by_account[pk].append(skill_id)
+    for pk, stale in removed_by_account.items():
+        DeveloperSkill.objects.filter(account_id=pk, skill_id__in=stale).delete()
+    DeveloperSkill.objects.bulk_create(
+        [DeveloperSkill(account_id=pk, skill_id=skill_id) for pk, skill_id in added], batch_size=BATCH_SIZE
+    )
+    deltas = Counter(skill_id for _, skill_id in added)
+    deltas.subtract(skill_id for _, skill_id in removed)
+    adjust(SkillTag, deltas)
+
+    moves, deltas = defaultdict(list), Counter()
+    for pk, _, _, place_id in accounts:
+        new_place_id = location_ids.get(wanted_places.get(pk))
+        if new_place_id != place_id:
+            moves[new_place_id].append(pk)
+            deltas[place_id] -= 1
+            deltas[new_place_id] += 1
+    for place_id, pks in moves.items():
+        Account.objects.filter(pk__in=pks).update(place_id=place_id)
+    deltas.pop(None, None)
+    adjust(Location, deltas)
+    return {pk: place_id for place_id, pks in moves.items() for pk in pks}
+
+
+def release_account(account):
+    """Take a deleted account out of the facet counts; its rows go with the cascade."""
+    SkillTag.objects.filter(accounts=account).update(developer_count=F('developer_count') - 1)
+    Location.objects.filter(accounts=account).update(developer_count=F('developer_count') - 1)
+
+
+def rebuild_facets():
+    """Resync every account and recount every facet. Returns the number of accounts."""
+    pks = list(Account.objects.values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        sync_accounts(pks[start:start + BATCH_SIZE])
+
+    skills = DeveloperSkill.objects.filter(skill=OuterRef('pk'))\
+        .order_by().values('skill').annotate(total=Count('pk')).values('total')
+    SkillTag.objects.update(developer_count=Coalesce(Subquery(skills), Value(0)))
+    places = Account.objects.filter(place=OuterRef('pk'))\
+        .order_by().values('place').annotate(total=Count('pk')).values('total')
+    Location.objects.update(developer_count=Coalesce(Subquery(places), Value(0)))
+    return len(pks)
+
+
+def chips(model, selected, limit=12):
+    """The most common facets plus any selected ones, with their stored counts."""
+    facets = list(model.objects.popular(limit))
+    missing = set(selected) - {facet.slug for facet in facets}
+    if missing:
+        facets += model.objects.filter(slug__in=missing)
+    return facets
+
+
+def filter_developers(users, facets):
+    """
+    Narrow a User queryset to developers having every facet. Each facet is
+    its own join on an indexed column, rarest first, so the database
+    intersects the smallest sets.
+    """
+    for facet in sorted(facets, key=lambda facet: facet.developer_count):
+        if isinstance(facet, SkillTag):
+            users = users.filter(account__developerskill__skill=facet)
+        else:
+            users = users.filter(account__place=facet)
+    return users
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+from main.counters import rebuild_unread_counts
+
+
+def count_unread(apps, schema_editor):
+    rebuild_unread_counts(
+        apps.get_model('users', 'Account'), apps.get_model('main', 'Message'), schema_editor.connection.alias
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Unread messages'),
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
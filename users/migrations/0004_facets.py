@@ -0,0 +1,114 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+from main.utils import split_list
+
+
+DEFAULT_LOCATION = 'Location is not specified.'
+
+
+def skill_slug(name):
+    return slugify(name.replace('+', ' plus').replace('#', ' sharp'))
+
+
+def build_facets(apps, schema_editor):
+    Account = apps.get_model('users', 'Account')
+    Skill = apps.get_model('users', 'Skill')
+    SkillTag = apps.get_model('users', 'SkillTag')
+    Location = apps.get_model('users', 'Location')
+    DeveloperSkill = apps.get_model('users', 'DeveloperSkill')
+    db = schema_editor.connection.alias
+
+    names = list(Skill.objects.using(db).values_list('account_id', 'name').iterator())
+    skills, places, links = {}, {}, set()
+    for account_id, location, other_skills in Account.objects.using(db)\
+            .values_list('id', 'location', 'other_skills').iterator():
+        names += [(account_id, name) for name in split_list(other_skills)]
+        location = ' '.join((location or '').split())[:100]
+        slug = slugify(location, allow_unicode=True)[:120] if location != DEFAULT_LOCATION else ''
+        if slug:
+            places.setdefault(slug, [Location(name=location, slug=slug), []])[1].append(account_id)
+    for account_id, name in names:
+        slug = skill_slug(name)
+        if slug:
+            skills.setdefault(slug, SkillTag(name=name[:50], slug=slug))
+            links.add((account_id, slug))
+
+    for account_id, slug in links:
+        skills[slug].developer_count += 1
+    SkillTag.objects.using(db).bulk_create(skills.values(), batch_size=500)
+    ids = dict(SkillTag.objects.using(db).values_list('slug', 'id'))
+    DeveloperSkill.objects.using(db).bulk_create(
+        [DeveloperSkill(account_id=account_id, skill_id=ids[slug]) for account_id, slug in links], batch_size=500
+    )
+
+    for location, account_ids in places.values():
+        location.developer_count = len(account_ids)
+    Location.objects.using(db).bulk_create([location for location, _ in places.values()], batch_size=500)
+    ids = dict(Location.objects.using(db).values_list('slug', 'id'))
+    for slug, (_, account_ids) in places.items():
+        Account.objects.using(db).filter(id__in=account_ids).update(place_id=ids[slug])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Location name')),
+                ('slug', models.SlugField(allow_unicode=True, max_length=120, unique=True, verbose_name='Slug')),
+                ('developer_count', models.PositiveIntegerField(default=0, verbose_name='Number of developers')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-developer_count', 'name'], name='users_location_popular_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='accounts', to='users.location'),
+        ),
+        migrations.CreateModel(
+            name='SkillTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Skill name')),
+                ('slug', models.SlugField(max_length=60, unique=True, verbose_name='Slug')),
+                ('developer_count', models.PositiveIntegerField(default=0, verbose_name='Number of developers')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-developer_count', 'name'], name='users_skilltag_popular_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DeveloperSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.account')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.skilltag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='skill_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='accounts', through='users.DeveloperSkill', to='users.skilltag'),
+        ),
+        migrations.AddIndex(
+            model_name='developerskill',
+            index=models.Index(fields=['skill', 'account'], name='users_developerskill_skill_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='developerskill',
+            constraint=models.UniqueConstraint(fields=('account', 'skill'), name='users_developerskill_unique'),
+        ),
+        migrations.RunPython(build_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0004_facets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileDocument',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile_document', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('username', models.CharField(max_length=150, unique=True, verbose_name='Username')),
+                ('document', models.JSONField(verbose_name='Profile snapshot')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+            ],
+        ),
+    ]
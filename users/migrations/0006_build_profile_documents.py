@@ -0,0 +1,75 @@
+from django.db import migrations
+from django.db.models import Prefetch
+
+from main.utils import split_list
+
+
+BATCH_SIZE = 500
+
+
+def document(user):
+    """The same document users.documents.build returns, from historical models."""
+    account = user.account
+    return {
+        'id': user.pk,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'account': {
+            'avatar': account.avatar.name,
+            'summary': account.summary,
+            'location': account.location,
+            'about': account.about,
+            'other_skills': split_list(account.other_skills),
+        },
+        'links': [{'name': link.name, 'link': link.link, 'icon': link.icon} for link in account.link_set.all()],
+        'skills': [
+            {'id': skill.pk, 'name': skill.name, 'description': skill.description}
+            for skill in account.skill_set.all()
+        ],
+        'projects': [
+            {
+                'id': project.pk,
+                'title': project.title,
+                'description': project.description,
+                'image': project.image.name,
+                'date': project.date.isoformat(),
+                'comment_count': project.comment_count,
+                'tags': [[tag.name, tag.slug] for tag in project.tags.all()],
+            }
+            for project in user.project_set.all()
+        ],
+    }
+
+
+def build_documents(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    Link = apps.get_model('users', 'Link')
+    Skill = apps.get_model('users', 'Skill')
+    Project = apps.get_model('main', 'Project')
+    ProfileDocument = apps.get_model('users', 'ProfileDocument')
+    db = schema_editor.connection.alias
+
+    pks = list(User.objects.using(db).filter(account__isnull=False).values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        users = User.objects.using(db).filter(pk__in=pks[start:start + BATCH_SIZE]).select_related('account')\
+            .prefetch_related(
+                Prefetch('account__link_set', Link.objects.using(db).order_by('pk')),
+                Prefetch('account__skill_set', Skill.objects.using(db).order_by('pk')),
+                Prefetch('project_set', Project.objects.using(db).order_by('-date', 'id').prefetch_related('tags')),
+            )
+        ProfileDocument.objects.using(db).bulk_create([
+            ProfileDocument(user_id=user.pk, username=user.username, document=document(user)) for user in users
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_project_comment_count'),
+        ('users', '0005_profile_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
@@ -2,18 +2,70 @@ from django.db import models
 
 from django.contrib.auth.models import User
 
+from main.utils import DirtyFieldsMixin
 
-class Account(models.Model):
+
+class FacetQuerySet(models.QuerySet):
+    def popular(self, limit=12):
+        return self.filter(developer_count__gt=0).order_by('-developer_count', 'name')[:limit]
+
+
+class SkillTag(models.Model):
+    name = models.CharField('Skill name', max_length=50)
+    slug = models.SlugField('Slug', max_length=60, unique=True)
+    developer_count = models.PositiveIntegerField('Number of developers', default=0)
+
+    objects = FacetQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-developer_count', 'name'], name='users_skilltag_popular_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Location(models.Model):
+    name = models.CharField('Location name', max_length=100)
+    slug = models.SlugField('Slug', max_length=120, unique=True, allow_unicode=True)
+    developer_count = models.PositiveIntegerField('Number of developers', default=0)
+
+    objects = FacetQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-developer_count', 'name'], name='users_location_popular_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Account(DirtyFieldsMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     avatar = models.ImageField(default='/avatars/default.jpg', upload_to='avatars')
     summary = models.TextField('Summary about user', default='New user on our platform!')
     location = models.TextField('Place of residence', default='Location is not specified.')
     about = models.TextField('About', default='Apparently, this user prefers to keep an air of mystery about them.')
     other_skills = models.TextField('Other skills', null=True, blank=True, help_text='Comma-separated skills')
+    place = models.ForeignKey(
+        Location, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='accounts'
+    )
+    skill_tags = models.ManyToManyField(
+        SkillTag, through='DeveloperSkill', blank=True, editable=False, related_name='accounts'
+    )
+    unread_count = models.PositiveIntegerField('Unread messages', default=0, editable=False)
+    updated_at = models.DateTimeField('Updated at', auto_now=True, db_index=True)
 
     def __str__(self):
         return f'{self.user.username} Account'
 
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields'):
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
+        super().save(*args, **kwargs)
+
 
 class Skill(models.Model):
     account = models.ForeignKey(Account, on_delete=models.CASCADE)
@@ -24,6 +76,22 @@ class Skill(models.Model):
         return f'{self.account} - {self.name} Skill'
 
 
+class DeveloperSkill(models.Model):
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    skill = models.ForeignKey(SkillTag, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'skill'], name='users_developerskill_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['skill', 'account'], name='users_developerskill_skill_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.account} - {self.skill} Skill'
+
+
 class Link(models.Model):
     ICONS = (
         ('im im-github', 'GitHub'),
@@ -39,3 +107,13 @@ class Link(models.Model):
 
     def __str__(self):
         return f'{self.name} Link'
+
+
+class ProfileDocument(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='profile_document')
+    username = models.CharField('Username', max_length=150, unique=True)
+    document = models.JSONField('Profile snapshot')
+    updated_at = models.DateTimeField('Updated at', auto_now=True)
+
+    def __str__(self):
+        return f'{self.username} Profile Document'
@@ -1,8 +1,34 @@
-from django.db.models.signals import post_save
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
 from django.contrib.auth.models import User
-from .models import Account
+from main import autocomplete, cards, conditional, inbox, pagecache, recommendations, search
+from main.models import Comment, Project
+from main.utils import login_only
+
+from . import documents, facets
+from .auth import forget_user
+from .models import Account, Link, Skill
+
+
+# The User columns that pages show; saving only others, such as email or password, leaves pages as they were.
+DISPLAYED_USER_FIELDS = {'first_name', 'last_name', 'username'}
+
+
+def account_users(*account_ids):
+    return Account.objects.filter(pk__in=account_ids).values_list('user_id', flat=True)
+
+
+def reindex_accounts(*account_ids):
+    search.index_developers(account_users(*account_ids))
+
+
+def purge_facet_pages():
+    # Every developers page lists the skill and location chips with their counts.
+    pagecache.purge('developers')
 
 
 @receiver(post_save, sender=User)
@@ -12,5 +38,214 @@ def create_account(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_account(sender, instance, **kwargs):
-    instance.account.save()
+def save_account(sender, instance, created, **kwargs):
+    if not created and User.account.is_cached(instance):
+        instance.account.save_changes()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def forget_cached_account(sender, instance, **kwargs):
+    forget_user(instance.user_id)
+
+
+@receiver(post_save, sender=Account)
+def sync_account_facets(sender, instance, created, update_fields=None, **kwargs):
+    if created and not instance.other_skills and not facets.location_name(instance.location):
+        return
+    if update_fields is None or {'location', 'other_skills'} & set(update_fields):
+        moved = facets.sync_accounts([instance.pk])
+        if instance.pk in moved:
+            instance.place_id = moved[instance.pk]
+        purge_facet_pages()
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def sync_skill_facets(sender, instance, origin=None, **kwargs):
+    # Skills deleted along with their account are covered by release_account_facets.
+    if kwargs['signal'] is post_delete and not isinstance(origin, Skill) and getattr(origin, 'model', None) is not Skill:
+        return
+    facets.sync_accounts([instance.account_id])
+    purge_facet_pages()
+
+
+@receiver(pre_delete, sender=Account)
+def release_account_facets(sender, instance, **kwargs):
+    facets.release_account(instance)
+    purge_facet_pages()
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, created, update_fields, **kwargs):
+    if not created and not login_only(update_fields):
+        search.index_developers([instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    search.remove_developers([instance.pk])
+
+
+@receiver(post_save, sender=Account)
+def index_account(sender, instance, **kwargs):
+    search.index_developers([instance.user_id])
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def index_skill(sender, instance, **kwargs):
+    reindex_accounts(instance.account_id)
+
+
+@receiver(pre_delete, sender=User)
+def release_user_comments(sender, instance, **kwargs):
+    """Uncount a deleted user's comments on other developers' projects in one update."""
+    project_ids = list(
+        Comment.objects.filter(author=instance).exclude(project__user=instance)
+        .values_list('project_id', flat=True).distinct()
+    )
+    if not project_ids:
+        return
+    authored = Comment.objects.filter(project=OuterRef('pk'), author=instance)\
+        .order_by().values('project').annotate(total=Count('pk')).values('total')
+    Project.objects.filter(pk__in=project_ids).update(
+        comment_count=Greatest(F('comment_count') - Subquery(authored), 0), updated_at=timezone.now()
+    )
+    cards.bump('project', *project_ids)
+    pagecache.purge(*(f'project:{pk}' for pk in project_ids))
+    documents.refresh_projects(*project_ids)
+
+
+@receiver(pre_delete, sender=User)
+def release_sent_messages(sender, instance, **kwargs):
+    inbox.release_sent_messages(instance)
+
+
+@receiver(post_save, sender=User)
+def refresh_user_cards(sender, instance, created, update_fields, **kwargs):
+    if created or login_only(update_fields):
+        return
+    cards.bump('developer', instance.pk)
+    cards.bump('project', *Project.objects.filter(user=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Account)
+def refresh_account_card(sender, instance, **kwargs):
+    cards.bump('developer', instance.user_id)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def refresh_skill_card(sender, instance, **kwargs):
+    cards.bump('developer', *account_users(instance.account_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def purge_user_pages(sender, instance, created=False, update_fields=None, **kwargs):
+    if login_only(update_fields):
+        return
+    tags = [f'user:{instance.pk}']
+    if created or kwargs['signal'] is post_delete:
+        tags.append('developers')
+    pagecache.purge(*tags)
+
+
+@receiver(post_save, sender=Account)
+def purge_account_pages(sender, instance, **kwargs):
+    pagecache.purge(f'user:{instance.user_id}')
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def purge_skill_pages(sender, instance, **kwargs):
+    pagecache.purge(*(f'user:{pk}' for pk in account_users(instance.account_id)))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def touch_user_pages(sender, instance, created=False, update_fields=None, **kwargs):
+    if kwargs['signal'] is post_delete:
+        conditional.record_deletion('user')
+    elif not created and (update_fields is None or DISPLAYED_USER_FIELDS & set(update_fields)):
+        conditional.touch_accounts(instance.pk)
+        conditional.touch_projects(*Project.objects.filter(user=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=Link)
+@receiver(post_delete, sender=Link)
+def touch_account_pages(sender, instance, **kwargs):
+    conditional.touch_accounts(*account_users(instance.account_id))
+
+
+@receiver(post_save, sender=Account)
+def stale_account_recommendations(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'other_skills' in update_fields:
+        recommendations.mark_stale('developer', instance.user_id)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def stale_skill_recommendations(sender, instance, **kwargs):
+    user_ids = list(account_users(instance.account_id))
+    recommendations.mark_stale('developer', *user_ids)
+    recommendations.mark_stale('project', *Project.objects.filter(user_id__in=user_ids).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def complete_user(sender, instance, created=False, update_fields=None, **kwargs):
+    if kwargs['signal'] is post_delete:
+        autocomplete.remove('developer', instance.pk)
+    elif not login_only(update_fields):
+        name = f'{instance.first_name} {instance.last_name}'.strip() or instance.username
+        autocomplete.put('developer', instance.pk, name, instance.username)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def complete_skill(sender, instance, created=False, **kwargs):
+    # Renamed skills keep their old name in the index until the next snapshot.
+    if kwargs['signal'] is post_delete:
+        autocomplete.remove_skill(instance.name)
+    elif created:
+        autocomplete.add_skill(instance.name)
+
+
+@receiver(pre_delete, sender=User)
+def hold_profile_document(sender, instance, **kwargs):
+    documents.deleting.add(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def release_profile_document(sender, instance, **kwargs):
+    documents.deleting.discard(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def refresh_user_document(sender, instance, created, update_fields, **kwargs):
+    # A new user's document is written once its account exists.
+    if not created and not login_only(update_fields):
+        documents.refresh(instance.pk)
+
+
+@receiver(post_save, sender=Account)
+def refresh_account_document(sender, instance, **kwargs):
+    documents.refresh(instance.user_id)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=Link)
+@receiver(post_delete, sender=Link)
+def refresh_account_part_document(sender, instance, **kwargs):
+    documents.refresh(*account_users(instance.account_id))
@@ -0,0 +1,225 @@
+import re
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from devSearch import sessions
+from devSearch.sessions import SessionStore
+from main.models import Project, ProjectTag, Tag
+
+from . import documents
+from .models import Link, ProfileDocument, Skill
+
+
+SIZES = (6, 60)
+
+
+def developer(username, size):
+    """A developer with ``size`` projects, skills and links."""
+    user = User.objects.create(username=username, first_name='Ada', last_name='Lovelace')
+    projects = Project.objects.bulk_create([
+        Project(user=user, title=f'Project {index}', description='A project.', image='project_images/default.jpg')
+        for index in range(size)
+    ])
+    tags = list(Tag.objects.order_by('pk')[:3])
+    ProjectTag.objects.bulk_create([ProjectTag(project=project, tag=tag) for project in projects for tag in tags])
+    Skill.objects.bulk_create([Skill(account=user.account, name=f'Skill {index}') for index in range(size)])
+    Link.objects.bulk_create([
+        Link(account=user.account, name=f'Link {index}', link=f'https://example.com/{index}', icon='im im-globe')
+        for index in range(size)
+    ])
+    documents.refresh(user.pk)
+    return user
+
+
+@override_settings(QUERY_BUDGET_CHECKS=True, QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """Profile pages stay within their budget however many projects, skills and links a developer has."""
+
+    @classmethod
+    def setUpTestData(cls):
+        with mock.patch('main.autocomplete.rebuild'):
+            call_command('seed', users=20, random_seed=6, stdout=StringIO())
+        cls.developers = [developer(f'dev{size}@example.com', size) for size in SIZES]
+
+    def queries(self, url, user=None):
+        cache.clear()
+        if user:
+            self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_profile(self):
+        counts = {self.queries(reverse('profile', args=[user.username])) for user in self.developers}
+        self.assertEqual(len(counts), 1)
+
+    def test_account(self):
+        counts = {self.queries(reverse('account'), user) for user in self.developers}
+        self.assertEqual(len(counts), 1)
+
+
+@override_settings(ROOT_URLCONF='devSearch.asgi_urls', QUERY_BUDGET_CHECKS=True, QUERY_BUDGET_STRICT=True)
+class AsyncQueryBudgetTests(QueryBudgetTests):
+    """The same budgets for the native async profile view."""
+
+
+class SessionTests(TestCase):
+    def test_logout_elsewhere_drops_the_local_copy(self):
+        store = SessionStore()
+        store['user'] = 'ada'
+        store.save()
+        key = store.cache_key
+        self.assertEqual(SessionStore(store.session_key).load(), {'user': 'ada'})
+
+        # Another process logs out; this process still holds the session in its local tier.
+        entry = sessions.local.entries[key]
+        SessionStore(store.session_key).delete()
+        sessions.local.entries[key] = entry
+        self.assertEqual(SessionStore(store.session_key).load(), {})
+
+    def test_save_elsewhere_replaces_the_local_copy(self):
+        store = SessionStore()
+        store['user'] = 'ada'
+        store.save()
+        entry = sessions.local.entries[store.cache_key]
+
+        other = SessionStore(store.session_key)
+        other['user'] = 'grace'
+        other.save()
+        sessions.local.entries[store.cache_key] = entry
+        self.assertEqual(SessionStore(store.session_key).load(), {'user': 'grace'})
+
+
+class ConditionalGetTests(TestCase):
+    def test_profile_revalidates_in_one_query(self):
+        user = User.objects.create(username='ada@example.com', first_name='Ada', last_name='Lovelace')
+        url = reverse('profile', args=[user.username])
+        self.client.get(url)
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class FacetPageTests(TestCase):
+    """Facet chips show on every developers page, including pages that do not list the changed developer."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='ada@example.com', first_name='Ada', last_name='Lovelace')
+        for index in range(6):
+            User.objects.create(username=f'dev{index}@example.com', first_name='Dev', last_name=str(index))
+        self.client.get(reverse('index'))
+        self.assertEqual(self.client.get(reverse('index'))['X-Page-Cache'], 'hit')
+
+    def test_skill_changes_purge_the_developer_pages(self):
+        skill = Skill.objects.create(account=self.user.account, name='Rust')
+        self.assertContains(self.client.get(reverse('index')), 'Rust')
+
+        skill.delete()
+        self.assertNotContains(self.client.get(reverse('index')), 'Rust')
+
+    def test_location_changes_purge_the_developer_pages(self):
+        self.user.account.location = 'Lisbon, Portugal'
+        self.user.account.save()
+        self.assertContains(self.client.get(reverse('index')), 'Lisbon, Portugal')
+
+
+class SaveAccountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'ada@example.com', 'ada@example.com', 'engine', first_name='Ada', last_name='Lovelace'
+        )
+        self.user.account.other_skills = ['Python', 'Django']
+        self.user.account.save()
+
+    def updates(self, queries, table):
+        """The columns set by each UPDATE of ``table``."""
+        return [
+            re.findall(r'"(\w+)" = ', query['sql'].split(' SET ', 1)[1].split(' WHERE ', 1)[0])
+            for query in queries if query['sql'].startswith(f'UPDATE "{table}"')
+        ]
+
+    def test_login_writes_no_account_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('login'), {'email': 'ada@example.com', 'password': 'engine'})
+        self.assertEqual(self.updates(queries, 'auth_user'), [['last_login']])
+        writes = [query['sql'] for query in queries if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertFalse([sql for sql in writes if '"users_account"' in sql])
+
+    def test_edit_account_writes_only_changed_columns(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('edit-account'), {
+                'full_name': 'Ada Lovelace', 'email': 'ada@example.com', 'summary': 'Wrote the first program.',
+                'location': self.user.account.location, 'about': self.user.account.about, 'skills': 'Python, Django',
+            })
+        self.assertEqual(self.updates(queries, 'auth_user'), [])
+        self.assertEqual(self.updates(queries, 'users_account'), [['summary', 'updated_at']])
+
+    def test_email_changes_leave_the_pages_alone(self):
+        Project.objects.create(user=self.user, title='Engine', description='Analytical.')
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('edit-account'), {
+                'full_name': 'Ada Lovelace', 'email': 'ada@lovelace.example', 'summary': self.user.account.summary,
+                'location': self.user.account.location, 'about': self.user.account.about, 'skills': 'Python, Django',
+            })
+        self.assertEqual(self.updates(queries, 'auth_user'), [['email']])
+        self.assertEqual(self.updates(queries, 'users_account'), [])
+        self.assertEqual(self.updates(queries, 'main_project'), [])
+
+
+class ProfileDocumentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='ada@example.com', first_name='Ada', last_name='Lovelace')
+        self.project = Project.objects.create(user=self.user, title='Engine', description='Analytical.')
+
+    def stored(self):
+        return ProfileDocument.objects.get(user=self.user).document
+
+    def test_signals_keep_the_document_current(self):
+        self.assertEqual(self.stored()['projects'][0]['title'], 'Engine')
+        Skill.objects.create(account=self.user.account, name='Mathematics')
+        self.project.title = 'Difference Engine'
+        self.project.save()
+        document = self.stored()
+        self.assertEqual([skill['name'] for skill in document['skills']], ['Mathematics'])
+        self.assertEqual(document['projects'][0]['title'], 'Difference Engine')
+        self.assertEqual(documents.check(), ([], [], []))
+
+    def test_refresh_drops_the_documents_of_deleted_users(self):
+        ProfileDocument.objects.filter(user=self.user).update(document={})
+        self.assertEqual(documents.check(), ([], [self.user.pk], []))
+        documents.refresh(self.user.pk)
+        self.assertEqual(self.stored(), documents.fetch(pk=self.user.pk))
+
+        User.objects.filter(pk=self.user.pk).delete()
+        documents.refresh(self.user.pk)
+        self.assertFalse(ProfileDocument.objects.exists())
+
+    def test_missing_documents_are_built_on_the_fly(self):
+        ProfileDocument.objects.all().delete()
+        self.assertContains(self.client.get(reverse('profile', args=[self.user.username])), 'Engine')
+        self.assertEqual(documents.fetch(username=self.user.username)['projects'][0]['title'], 'Engine')
+        with self.assertRaises(CommandError):
+            call_command('check_profiles', stdout=StringIO())
+
+        call_command('check_profiles', fix=True, stdout=StringIO())
+        self.assertEqual(documents.check(), ([], [], []))
+
+    def test_the_migration_builds_existing_documents(self):
+        ProfileDocument.objects.all().delete()
+        migration = import_module('users.migrations.0006_build_profile_documents')
+        migration.build_documents(apps, mock.Mock(connection=connection))
+        self.assertEqual(documents.check(), ([], [], []))
@@ -1,4 +1,4 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 
 from django.contrib.auth.models import User
@@ -7,11 +7,18 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 
-from django.db import IntegrityError
-from django.http import HttpResponseForbidden
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponseForbidden
 
+from . import documents
 from .models import Skill
-from main.models import Project
+from main.cards import render_cards
+from main.conditional import conditional_page, profile_modified
+from main.decorators import query_budget
+from main.pagecache import cache_anonymous_page, tag_page
+from main.renditions import schedule_renditions
+from main.models import Project, SimilarDeveloper
+from main.utils import changed_fields, field_state
 
 
 def signup(request):
@@ -59,19 +66,29 @@ def logOut(request):
 
 
 @login_required(login_url='login')
+@query_budget(6)
 def account(request):
-    context = {
-        'user': request.user,
-        'projects': Project.objects.filter(user=request.user).order_by('-date')
-    }
+    user, links, skills, projects = documents.unpack(documents.fetch(pk=request.user.pk))
+    context = {'user': user, 'links': links, 'skills': skills, 'projects': projects}
     return render(request, 'account.html', context)
 
 
+@conditional_page(profile_modified)
+@cache_anonymous_page
+@query_budget(8)
 def profile(request, username):
-    user = User.objects.get(username=username)
+    document = documents.fetch(username=username)
+    if document is None:
+        raise Http404('No such developer')
+    user, links, skills, projects = documents.unpack(document)
+    project_ids = [project.pk for project in projects]
+    tag_page(request, f'user:{user.pk}', *(f'project:{pk}' for pk in project_ids))
     context = {
         'user': user,
-        'projects': Project.objects.filter(user=user).order_by('-date')
+        'links': links,
+        'skills': skills,
+        'similar_developers': SimilarDeveloper.objects.filter(user=user).select_related('similar__account').order_by('rank'),
+        'cards': render_cards('project', project_ids, objects={project.pk: project for project in projects})
     }
     return render(request, 'profile.html', context)
 
@@ -85,6 +102,7 @@ def editAccount(request):
             messages.info(request, 'Full name is incorrect!')
 
         else:
+            user_state = field_state(user)
             user.first_name = request.POST.get('full_name').rsplit(' ')[0]
             user.last_name = request.POST.get('full_name').rsplit(' ')[1]
             user.email = request.POST.get('email')
@@ -95,7 +113,13 @@ def editAccount(request):
             if request.FILES.get('avatar') is not None:
                 user.account.avatar = request.FILES.get('avatar')
 
-            user.save()
+            with transaction.atomic():
+                user_fields = changed_fields(user, user_state)
+                if user_fields:
+                    user.save(update_fields=user_fields)
+                user.account.save_changes()
+            if request.FILES.get('avatar') is not None:
+                schedule_renditions(user.account.avatar, 'developer', user.pk)
             return redirect('account')
 
     return render(request, 'account-edit-form.html', {'user': user})
@@ -117,8 +141,8 @@ def addSkill(request):
 
 @login_required(login_url='login')
 def editSkill(request, id):
-    skill = Skill.objects.get(id=id)
-    if skill.account.user == request.user:
+    skill = get_object_or_404(Skill.objects.select_related('account'), id=id)
+    if skill.account.user_id == request.user.id:
         if request.method == 'POST':
             skill.name = request.POST.get('name')
             skill.description = request.POST.get('desc')
@@ -132,8 +156,8 @@ def editSkill(request, id):
 
 @login_required(login_url='login')
 def deleteSkill(request, id):
-    skill = Skill.objects.get(id=id)
-    if skill.account.user == request.user:
+    skill = get_object_or_404(Skill.objects.select_related('account'), id=id)
+    if skill.account.user_id == request.user.id:
         if request.method == 'POST':
             skill.delete()
             return redirect('account')
@@ -153,11 +177,12 @@ def addProject(request):
             user=request.user,
             title=request.POST.get('title'),
             description=request.POST.get('description'),
-            tags=request.POST.get('tags').rsplit(', '),
             link=request.POST.get('link'),
             image=request.FILES.get('image')
         )
         project.save()
+        project.set_tags(request.POST.get('tags'))
+        schedule_renditions(project.image, 'project', project.pk)
         return redirect('account')
 
     return render(request, 'project-add-edit-form.html')
@@ -165,17 +190,20 @@ def addProject(request):
 
 @login_required(login_url='login')
 def editProject(request, id):
-    project = Project.objects.get(id=id)
-    if project.user == request.user:
+    project = get_object_or_404(Project.objects.prefetch_related('tags'), id=id)
+    if project.user_id == request.user.id:
         if request.method == 'POST':
             project.title = request.POST.get('title')
             project.description = request.POST.get('description')
             project.link = request.POST.get('link')
-            project.tags = request.POST.get('tags').rsplit(', ')
             if request.FILES.get('image'):
                 project.image = request.FILES.get('image')
 
-            project.save()
+            # Leave comment_count to the F() updates of concurrent comments.
+            project.save(update_fields=['title', 'description', 'link', 'image'])
+            project.set_tags(request.POST.get('tags'))
+            if request.FILES.get('image'):
+                schedule_renditions(project.image, 'project', project.pk)
             return redirect('account')
 
         return render(request, 'project-add-edit-form.html', {'project': project})
@@ -186,8 +214,8 @@ def editProject(request, id):
 
 @login_required(login_url='login')
 def deleteProject(request, id):
-    project = Project.objects.get(id=id)
-    if project.user == request.user:
+    project = get_object_or_404(Project.objects.prefetch_related('tags'), id=id)
+    if project.user_id == request.user.id:
         if request.method == 'POST':
             project.delete()
             return redirect('account')